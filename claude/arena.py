@@ -0,0 +1,268 @@
+import heapq
+import math
+from array import array
+
+# Straight and diagonal step costs for the flow field (about 1 : sqrt(2))
+STRAIGHT_COST = 10
+DIAGONAL_COST = 14
+NEIGHBOURS = (
+    (1, 0, STRAIGHT_COST), (-1, 0, STRAIGHT_COST), (0, 1, STRAIGHT_COST), (0, -1, STRAIGHT_COST),
+    (1, 1, DIAGONAL_COST), (1, -1, DIAGONAL_COST), (-1, 1, DIAGONAL_COST), (-1, -1, DIAGONAL_COST),
+)
+
+# Default layout as fractions of the screen (x0, y0, x1, y1): four pillars and
+# four wall segments, clear of the edges (where enemies and bosses spawn) and
+# the middle (where the player starts and rushing bosses land)
+DEFAULT_OBSTACLES = (
+    (0.23, 0.27, 0.27, 0.34),
+    (0.73, 0.27, 0.77, 0.34),
+    (0.23, 0.66, 0.27, 0.73),
+    (0.73, 0.66, 0.77, 0.73),
+    (0.49, 0.15, 0.51, 0.32),
+    (0.49, 0.68, 0.51, 0.85),
+    (0.12, 0.48, 0.30, 0.52),
+    (0.70, 0.48, 0.88, 0.52),
+)
+
+
+class Arena:
+    # Static obstacles on a grid of `cell_size` pixel cells.
+    #
+    # Obstacles are snapped to whole cells and kept as one byte per cell, so
+    # "is this point in a wall" is a single lookup. The same grid blocks the
+    # player, stops projectiles (segment_hit walks the cells a shot crossed
+    # this tick, so fast shots can't skip a thin wall) and carries the
+    # FlowField enemies follow around the walls. Everything outside the
+    # grid is open.
+    def __init__(self, width, height, cell_size=40):
+        self.cell_size = cell_size
+        self.cols = -(-width // cell_size)
+        self.rows = -(-height // cell_size)
+        self.blocked = bytearray(self.cols * self.rows)
+        self.obstacles = []  # snapped (x0, y0, x1, y1) rectangles, for drawing
+        self.field = FlowField(self)
+
+    def add_obstacle(self, x0, y0, x1, y1):
+        # Block every cell the rectangle overlaps
+        size = self.cell_size
+        col0 = max(0, int(x0 // size))
+        row0 = max(0, int(y0 // size))
+        col1 = min(self.cols, math.ceil(x1 / size))
+        row1 = min(self.rows, math.ceil(y1 / size))
+        if col0 >= col1 or row0 >= row1:
+            return
+        for row in range(row0, row1):
+            start = row * self.cols
+            self.blocked[start + col0:start + col1] = b"\x01" * (col1 - col0)
+        self.obstacles.append((col0 * size, row0 * size, col1 * size, row1 * size))
+        self.field.invalidate()
+
+    def add_default_obstacles(self, width, height):
+        for x0, y0, x1, y1 in DEFAULT_OBSTACLES:
+            self.add_obstacle(x0 * width, y0 * height, x1 * width, y1 * height)
+
+    def cell_index(self, x, y):
+        # Grid cell under (x, y), or -1 outside the grid
+        col = int(x // self.cell_size)
+        row = int(y // self.cell_size)
+        if 0 <= col < self.cols and 0 <= row < self.rows:
+            return row * self.cols + col
+        return -1
+
+    def point_blocked(self, x, y):
+        # Whether (x, y) is inside a wall cell
+        index = self.cell_index(x, y)
+        return index >= 0 and self.blocked[index] != 0
+
+    def box_blocked(self, x, y, half):
+        # Whether a 2 * half square centred on (x, y) overlaps a wall
+        size = self.cell_size
+        col0 = max(0, int((x - half) // size))
+        col1 = min(self.cols - 1, int((x + half) // size))
+        row0 = max(0, int((y - half) // size))
+        row1 = min(self.rows - 1, int((y + half) // size))
+        blocked = self.blocked
+        for row in range(row0, row1 + 1):
+            start = row * self.cols
+            if any(blocked[start + col0:start + col1 + 1]):
+                return True
+        return False
+
+    def segment_hit(self, x0, y0, x1, y1):
+        # Fraction (0..1) of the way from (x0, y0) to (x1, y1) at which the
+        # segment enters its first wall cell, or None if it crosses none.
+        # Walks the crossed cells in order (Amanatides & Woo).
+        size = self.cell_size
+        cols = self.cols
+        rows = self.rows
+        blocked = self.blocked
+        col = int(x0 // size)
+        row = int(y0 // size)
+        if 0 <= col < cols and 0 <= row < rows and blocked[row * cols + col]:
+            return 0.0
+        end_col = int(x1 // size)
+        end_row = int(y1 // size)
+        if col == end_col and row == end_row:
+            return None
+
+        dx = x1 - x0
+        dy = y1 - y0
+        if dx > 0:
+            step_col = 1
+            next_x = ((col + 1) * size - x0) / dx
+            delta_x = size / dx
+        elif dx < 0:
+            step_col = -1
+            next_x = (col * size - x0) / dx
+            delta_x = -size / dx
+        else:
+            step_col = 0
+            next_x = delta_x = math.inf
+        if dy > 0:
+            step_row = 1
+            next_y = ((row + 1) * size - y0) / dy
+            delta_y = size / dy
+        elif dy < 0:
+            step_row = -1
+            next_y = (row * size - y0) / dy
+            delta_y = -size / dy
+        else:
+            step_row = 0
+            next_y = delta_y = math.inf
+
+        while True:
+            if next_x < next_y:
+                t = next_x
+                col += step_col
+                next_x += delta_x
+            else:
+                t = next_y
+                row += step_row
+                next_y += delta_y
+            if t > 1:
+                return None
+            if t == 1:
+                # A crossing at the end point (a corner tie) may pick the
+                # wrong neighbour: the end point lies in its own cell
+                if 0 <= end_col < cols and 0 <= end_row < rows and blocked[end_row * cols + end_col]:
+                    return t
+                return None
+            if 0 <= col < cols and 0 <= row < rows and blocked[row * cols + col]:
+                return t
+            if col == end_col and row == end_row:
+                return None
+
+
+class FlowField:
+    # Shortest-path directions from every open cell of an Arena to one goal
+    # cell (the player's).
+    #
+    # update() only changes anything when the goal moves to another cell,
+    # and the fields for the last `cache_size` goal cells are kept, so a
+    # player dodging back and forth over a cell border costs nothing. The
+    # search itself (a Dijkstra over the grid, 8 neighbours, no cutting
+    # corners past walls) runs when the player reaches a cell it hasn't been
+    # in lately. next_cell[c] is the neighbour to walk to from cell c, or -1
+    # where an enemy should just head straight for the player: the goal cell
+    # itself, wall cells and cells cut off from the goal. Enemies then look
+    # up their next step in O(1).
+    def __init__(self, arena, cache_size=32):
+        self.arena = arena
+        cells = arena.cols * arena.rows
+        self.unreachable = array("i", [-1]) * cells
+        self.next_cell = self.unreachable
+        size = arena.cell_size
+        self.centre_x = array("d", ((index % arena.cols + 0.5) * size for index in range(cells)))
+        self.centre_y = array("d", ((index // arena.cols + 0.5) * size for index in range(cells)))
+        self.cache_size = cache_size
+        self.cache = {}  # goal cell -> next_cell, least recently used first
+        self.neighbours = None  # per-cell links, see links()
+        self.goal = None
+        self.builds = 0
+
+    def invalidate(self):
+        # The walls changed: rebuild on the next update()
+        self.goal = None
+        self.cache.clear()
+        self.neighbours = None
+
+    def update(self, x, y):
+        # Point the field at (x, y). Returns True if the goal cell changed.
+        goal = self.arena.cell_index(x, y)
+        if goal == self.goal:
+            return False
+        self.goal = goal
+        next_cell = self.cache.pop(goal, None)
+        if next_cell is None:
+            self.builds += 1
+            next_cell = self.build(goal)
+            if len(self.cache) >= self.cache_size:
+                del self.cache[next(iter(self.cache))]
+        self.cache[goal] = next_cell
+        self.next_cell = next_cell
+        return True
+
+    def links(self):
+        # [(neighbour, step cost), ...] for every cell, walls left out.
+        # Only changes with the walls, so it is worked out once per layout.
+        if self.neighbours is not None:
+            return self.neighbours
+        arena = self.arena
+        cols = arena.cols
+        rows = arena.rows
+        blocked = arena.blocked
+        neighbours = []
+        for index in range(cols * rows):
+            col = index % cols
+            row = index // cols
+            links = []
+            for step_col, step_row, step_cost in NEIGHBOURS:
+                ncol = col + step_col
+                nrow = row + step_row
+                if not (0 <= ncol < cols and 0 <= nrow < rows):
+                    continue
+                neighbour = nrow * cols + ncol
+                if blocked[neighbour]:
+                    continue
+                if step_col and step_row and (blocked[row * cols + ncol] or blocked[nrow * cols + col]):
+                    continue  # diagonal past a wall corner
+                links.append((neighbour, step_cost))
+            neighbours.append(links)
+        self.neighbours = neighbours
+        return neighbours
+
+    def build(self, goal):
+        # next_cell for a goal cell, worked out from scratch
+        next_cell = array("i", self.unreachable)
+        if goal < 0 or self.arena.blocked[goal]:
+            return next_cell
+
+        neighbours = self.links()
+        cost = [-1] * len(next_cell)
+        cost[goal] = 0
+        queue = [(0, goal)]
+        pop = heapq.heappop
+        push = heapq.heappush
+        while queue:
+            current_cost, index = pop(queue)
+            if current_cost > cost[index]:
+                continue
+            for neighbour, step_cost in neighbours[index]:
+                new_cost = current_cost + step_cost
+                old_cost = cost[neighbour]
+                if old_cost < 0 or new_cost < old_cost:
+                    cost[neighbour] = new_cost
+                    next_cell[neighbour] = index
+                    push(queue, (new_cost, neighbour))
+        return next_cell
+
+    def waypoint(self, x, y, target_x, target_y):
+        # Where an enemy at (x, y) should head for: the centre of its next
+        # cell, or the target itself
+        index = self.arena.cell_index(x, y)
+        if index < 0:
+            return target_x, target_y
+        step = self.next_cell[index]
+        if step < 0:
+            return target_x, target_y
+        return self.centre_x[step], self.centre_y[step]
@@ -0,0 +1,124 @@
+import csv
+import tracemalloc
+from collections import Counter
+
+
+class LeakAuditor:
+    # Debug checks for long sessions: canvas items nobody owns, and Python
+    # heap growth from wave to wave.
+    #
+    # audit() lists canvas.find_all() and compares it with `owned_items()`,
+    # a callable returning every item id the game state holds (renderer
+    # views and pools, HUD, overlays). An item on the canvas that no owner
+    # knows about is an orphan: nothing will move or delete it again, so
+    # orphans pile up until the next delete("all"). Ids still owned but gone
+    # from the canvas are reported as missing. frame() runs an audit every
+    # `every_frames` frames and whenever the wave changes. Only new findings
+    # are logged.
+    #
+    # With tracing on, every wave change also takes a tracemalloc snapshot
+    # and diffs it against the previous wave's, logging the total growth and
+    # the `top` source lines that grew most. Tracing slows allocation down,
+    # so it only runs between start() and stop(). `canvas` may be None for
+    # headless runs, which only track the heap.
+    #
+    # `rows` keeps one row per wave for write_csv(), so a soak run can show
+    # that item counts and heap size level off.
+    def __init__(self, canvas, owned_items, every_frames=600, top=5, log=print):
+        self.canvas = canvas
+        self.owned_items = owned_items
+        self.every_frames = every_frames
+        self.top = top
+        self.log = log
+        self.frames = 0
+        self.wave = None
+        self.item_count = 0
+        self.peak_items = 0
+        self.orphans = set()  # orphans already reported
+        self.missing = set()
+        self.snapshot = None  # last wave's tracemalloc snapshot
+        self.heap_bytes = 0
+        self.rows = []
+
+    def start(self, depth=1):
+        # Trace Python allocations (`depth` frames per traceback)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(depth)
+        self.snapshot = None
+
+    def stop(self):
+        tracemalloc.stop()
+        self.snapshot = None
+
+    def frame(self, wave):
+        # Call once per rendered frame
+        self.frames += 1
+        if wave != self.wave:
+            self.wave = wave
+            self.wave_changed()
+        elif self.canvas is not None and self.frames % self.every_frames == 0:
+            self.audit()
+
+    def audit(self):
+        # Reconcile the canvas with the owners; returns the current orphans
+        items = set(self.canvas.find_all())
+        owned = set(self.owned_items())
+        orphans = items - owned
+        missing = owned - items
+        self.item_count = len(items)
+        self.peak_items = max(self.peak_items, len(items))
+
+        new_orphans = orphans - self.orphans
+        if new_orphans:
+            self.log(
+                f"audit frame {self.frames}: {len(new_orphans)} new orphan items "
+                f"({self.describe(new_orphans)}), {len(orphans)} in all, {len(items)} items"
+            )
+        new_missing = missing - self.missing
+        if new_missing:
+            self.log(f"audit frame {self.frames}: {len(new_missing)} owned items not on the canvas")
+        # Orphans deleted since (e.g. by delete("all")) are forgotten
+        self.orphans = orphans
+        self.missing = missing
+        return orphans
+
+    def describe(self, items):
+        # "text x3, rectangle [shop] x1" for a set of items
+        kinds = Counter()
+        for item in items:
+            tags = " ".join(tag for tag in self.canvas.gettags(item) if tag != "current")
+            kinds[f"{self.canvas.type(item)} [{tags}]" if tags else self.canvas.type(item)] += 1
+        return ", ".join(f"{kind} x{count}" for kind, count in kinds.most_common())
+
+    def wave_changed(self):
+        if self.canvas is not None:
+            self.audit()
+        growth = 0
+        if tracemalloc.is_tracing():
+            # Leave tracemalloc's own bookkeeping (the snapshots) out
+            snapshot = tracemalloc.take_snapshot().filter_traces(
+                (tracemalloc.Filter(False, tracemalloc.__file__),)
+            )
+            self.heap_bytes = sum(stat.size for stat in snapshot.statistics("filename"))
+            if self.snapshot is not None:
+                stats = snapshot.compare_to(self.snapshot, "lineno")
+                growth = sum(stat.size_diff for stat in stats)
+                self.log(
+                    f"wave {self.wave}: heap {self.heap_bytes / 1024:.1f} KB ({growth / 1024:+.1f} KB), "
+                    f"{self.item_count} canvas items, {len(self.orphans)} orphans"
+                )
+                for stat in stats[:self.top]:
+                    if stat.size_diff > 0:
+                        frame = stat.traceback[0]
+                        self.log(f"  {frame.filename}:{frame.lineno}  {stat.size_diff / 1024:+.1f} KB")
+            self.snapshot = snapshot
+        self.rows.append(
+            (self.wave, self.frames, self.item_count, len(self.orphans), self.heap_bytes, growth)
+        )
+
+    def write_csv(self, path):
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(("wave", "frame", "canvas_items", "orphans", "heap_bytes", "heap_growth_bytes"))
+            writer.writerows(self.rows)
+        return len(self.rows)
@@ -0,0 +1,205 @@
+# Batch runner for headless games.
+#
+# Plays many seeded games per shop strategy across worker processes and
+# prints one report, e.g. how far a bazooka-first build gets by wave 20:
+#
+#   python batch.py --games 1000 --strategy bazooka-first --strategy cycle --waves 20
+#
+# Games are grouped into chunks so each worker task is big enough to be
+# worth the pickling. Every game is a pure function of its seed and
+# strategy, and results are sorted before aggregating, so the report is the
+# same for any number of workers (apart from the timing figures).
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from simulation import Simulation, TICK_MS, UPGRADES, demo_policy
+
+
+def cycle_upgrades(sim, shops):
+    return UPGRADES[shops % len(UPGRADES)]
+
+
+def upgrade_first(upgrade, limit):
+    # Buy `upgrade` for the first `limit` shops, then cycle
+    def choose(sim, shops):
+        if shops < limit:
+            return upgrade
+        return UPGRADES[(shops - limit) % len(UPGRADES)]
+    return choose
+
+
+# Shop strategy name -> choose(sim, shops bought so far) -> upgrade
+STRATEGIES = {
+    "cycle": cycle_upgrades,
+    "bazooka-first": upgrade_first("bazooka", 2),
+    "gun-first": upgrade_first("gun", 3),
+    "shoes-first": upgrade_first("shoes", 3),
+    "color-first": upgrade_first("color", 4),
+    "heart-first": upgrade_first("heart", 3),
+    "homing-first": upgrade_first("homing", 3),
+}
+
+# Input policy name -> policy(sim, tick) -> set of held keys
+POLICIES = {
+    "demo": demo_policy,
+}
+
+
+def play_game(seed, strategy, policy, max_ticks, stop_wave):
+    # One life from a fresh seeded run until death, max_ticks or stop_wave
+    sim = Simulation(seed=seed)
+    choose = STRATEGIES[strategy]
+    act = POLICIES[policy]
+    shops = 0
+    tick = 0
+    start = time.perf_counter()
+    while tick < max_ticks and not sim.game_over:
+        if stop_wave and sim.wave_number >= stop_wave:
+            break
+        if sim.shop_open:
+            sim.buy_upgrade(choose(sim, shops))
+            shops += 1
+        sim.step(TICK_MS, act(sim, tick))
+        tick += 1
+    return {
+        "seed": seed,
+        "strategy": strategy,
+        "kills": sim.enemies_killed,
+        "wave": sim.wave_number,
+        "bosses_defeated": sim.boss_number,
+        # Highest boss met (1 = first boss), 0 if none spawned
+        "boss_reached": sim.boss_number + (sim.current_boss is not None),
+        "shops": shops,
+        "died": sim.game_over,
+        "ticks": tick,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def run_chunk(games, policy, max_ticks, stop_wave):
+    # Worker entry point: games is a list of (seed, strategy)
+    return [play_game(seed, strategy, policy, max_ticks, stop_wave) for seed, strategy in games]
+
+
+def chunked(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def run_batch(games, policy="demo", max_ticks=60000, stop_wave=None, workers=None, chunk_size=8, progress=None):
+    # Play every (seed, strategy) in games and return the results sorted by
+    # strategy and seed. workers=1 plays them in this process.
+    # progress(done, total) is called as chunks finish.
+    chunks = chunked(list(games), chunk_size)
+    results = []
+    if workers == 1:
+        for chunk in chunks:
+            results.extend(run_chunk(chunk, policy, max_ticks, stop_wave))
+            if progress:
+                progress(len(results), len(games))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(run_chunk, chunk, policy, max_ticks, stop_wave) for chunk in chunks]
+            for future in as_completed(futures):
+                results.extend(future.result())
+                if progress:
+                    progress(len(results), len(games))
+    results.sort(key=lambda result: (result["strategy"], result["seed"]))
+    return results
+
+
+def summarize(results, stop_wave=None):
+    # Per-strategy aggregates. Everything except the timing figures depends
+    # only on the seeds and strategies played.
+    by_strategy = {}
+    for result in results:
+        by_strategy.setdefault(result["strategy"], []).append(result)
+
+    report = {}
+    for strategy, games in by_strategy.items():
+        kills = [game["kills"] for game in games]
+        waves = [game["wave"] for game in games]
+        ticks = sum(game["ticks"] for game in games)
+        seconds = sum(game["seconds"] for game in games)
+        bosses = {}
+        for game in games:
+            bosses[game["boss_reached"]] = bosses.get(game["boss_reached"], 0) + 1
+        summary = {
+            "games": len(games),
+            "kills_mean": statistics.fmean(kills),
+            "kills_median": statistics.median(kills),
+            "kills_max": max(kills),
+            "wave_mean": statistics.fmean(waves),
+            "wave_max": max(waves),
+            "deaths": sum(game["died"] for game in games),
+            "boss_reached": {str(level): bosses[level] for level in sorted(bosses)},
+            "ticks": ticks,
+            "ticks_per_sec": ticks / seconds if seconds else None,
+        }
+        if stop_wave:
+            summary["reached_stop_wave"] = sum(wave >= stop_wave for wave in waves)
+        report[strategy] = summary
+    return report
+
+
+def print_report(report, stop_wave=None):
+    for strategy, summary in report.items():
+        line = (
+            f"{strategy:<14} games {summary['games']:5d}  kills mean {summary['kills_mean']:7.1f} "
+            f"median {summary['kills_median']:6.1f} max {summary['kills_max']:5d}  "
+            f"wave mean {summary['wave_mean']:5.2f} max {summary['wave_max']:3d}  "
+            f"deaths {summary['deaths']:5d}"
+        )
+        if stop_wave:
+            line += f"  reached wave {stop_wave}: {summary['reached_stop_wave']}"
+        print(line)
+        bosses = "  ".join(f"{level}: {count}" for level, count in summary["boss_reached"].items())
+        print(f"{'':<14} boss reached  {bosses}   {summary['ticks_per_sec'] or 0:.0f} ticks/s per worker")
+
+
+def print_progress(done, total):
+    sys.stderr.write(f"\r{done}/{total} games")
+    if done == total:
+        sys.stderr.write("\n")
+    sys.stderr.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play many headless games and aggregate the results.")
+    parser.add_argument("--games", type=int, default=100, help="games per strategy")
+    parser.add_argument("--seed", type=int, default=0, help="first seed (games use seed, seed + 1, ...)")
+    parser.add_argument("--strategy", action="append", choices=sorted(STRATEGIES), help="shop strategy (repeatable, default cycle)")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="demo", help="input policy")
+    parser.add_argument("--ticks", type=int, default=60000, help="tick limit per game")
+    parser.add_argument("--waves", type=int, help="stop a game once it reaches this wave")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes (1 = no pool)")
+    parser.add_argument("--chunk-size", type=int, default=8, help="games per work unit")
+    parser.add_argument("--out", help="write the report and per-game results as JSON to this file")
+    args = parser.parse_args()
+
+    strategies = args.strategy or ["cycle"]
+    games = [(args.seed + i, strategy) for strategy in strategies for i in range(args.games)]
+
+    start = time.perf_counter()
+    results = run_batch(
+        games, policy=args.policy, max_ticks=args.ticks, stop_wave=args.waves,
+        workers=args.workers, chunk_size=args.chunk_size, progress=print_progress
+    )
+    elapsed = time.perf_counter() - start
+    report = summarize(results, args.waves)
+    print_report(report, args.waves)
+    total_ticks = sum(result["ticks"] for result in results)
+    print(f"{len(results)} games, {total_ticks} ticks in {elapsed:.2f}s "
+          f"({total_ticks / elapsed:.0f} ticks/s with {args.workers} workers)")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"report": report, "games": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# Compares per-item canvas.coords() calls with the batched coords flush.
+#
+# Both renderers draw the same seeded scene while every entity moves a
+# little each frame. Reports milliseconds per draw (including Tk's redraw),
+# Python -> Tcl round trips per draw and canvas items touched per draw.
+# With --moving below 1 only that fraction of entities moves, the rest are
+# skipped by the renderer's dirty check. Needs a display (Tk window).
+#
+#   python benchmarks/bench_canvas_batch.py [--entities 100 500 2000] [--moving 0.25]
+import argparse
+import os
+import random
+import sys
+import time
+import tkinter as tk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from entities import FLAG_HOSTILE
+from renderer import CanvasRenderer
+from simulation import Simulation
+
+
+class CountingTk:
+    # Wraps the Tcl interpreter to count Python -> Tcl round trips
+    def __init__(self, tk_app):
+        self.tk_app = tk_app
+        self.calls = 0
+
+    def call(self, *args):
+        self.calls += 1
+        return self.tk_app.call(*args)
+
+    def eval(self, script):
+        self.calls += 1
+        return self.tk_app.eval(script)
+
+    def __getattr__(self, name):
+        return getattr(self.tk_app, name)
+
+
+def populate(sim, count, seed=1):
+    rng = random.Random(seed)
+    for _ in range(count // 2):
+        sim.enemies.add(x=rng.uniform(0, sim.screen_width), y=rng.uniform(0, sim.screen_height), hp=3)
+    for _ in range(count - count // 2):
+        flags = FLAG_HOSTILE if rng.random() < 0.3 else 0
+        sim.projectiles.add(
+            x=rng.uniform(0, sim.screen_width), y=rng.uniform(0, sim.screen_height),
+            dx=rng.uniform(-3, 3), dy=rng.uniform(-3, 3), flags=flags
+        )
+
+
+def measure(root, canvas, count, batch_coords, frames, moving=1.0):
+    canvas.delete("all")
+    sim = Simulation(1280, 720, seed=1)
+    populate(sim, count)
+    renderer = CanvasRenderer(canvas, sim, batch_coords=batch_coords)
+    renderer.draw()
+    root.update_idletasks()
+
+    counter = canvas.tk
+    counter.calls = 0
+    touched = 0
+    start = time.perf_counter()
+    for frame in range(frames):
+        # Nudge the moving share of entities far enough to be redrawn
+        step = 1 if frame % 2 else -1
+        for store in (sim.enemies, sim.projectiles):
+            xs = store.x
+            for i in range(int(len(xs) * moving)):
+                xs[i] += step
+        renderer.draw()
+        root.update_idletasks()
+        touched += renderer.touched
+    elapsed = time.perf_counter() - start
+    return elapsed * 1000 / frames, counter.calls // frames, touched // frames
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entities", type=int, nargs="+", default=[100, 500, 2000])
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--moving", type=float, default=1.0, help="share of entities that move each frame")
+    args = parser.parse_args()
+
+    root = tk.Tk()
+    canvas = tk.Canvas(root, width=1280, height=720)
+    canvas.pack()
+    canvas.tk = CountingTk(canvas.tk)
+
+    for count in args.entities:
+        for name, batch_coords in (("per-item", False), ("batched", True)):
+            ms, calls, touched = measure(root, canvas, count, batch_coords, args.frames, args.moving)
+            print(f"{count:6d} entities  {name:>8}: {ms:8.3f} ms per draw, {calls:5d} Tcl calls, "
+                  f"{touched:5d} items touched")
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
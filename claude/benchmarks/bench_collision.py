@@ -0,0 +1,87 @@
+# Benchmark for the projectile-vs-enemy collision pass of Simulation.step.
+#
+# Each scene is half enemies, half player shots, spread over the screen. It
+# is stepped once with the game's SpatialGrid broadphase and once with
+# NoBroadphase in its place, which hands every enemy to the same swept
+# collision code (the old nested scan). Reports the whole step and its
+# "collision" phase (profiler.py); both runs must end in the same state.
+#
+#   python benchmarks/bench_collision.py
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from replay import state_digest
+from simulation import Simulation, TICK_MS
+
+# Large enough that no contact ends the step early
+GOD_MODE_HP = 10**9
+
+
+class NoBroadphase:
+    # Stands in for Simulation.enemy_grid: every query returns every enemy
+    def __init__(self):
+        self.count = 0
+
+    def rebuild(self, points):
+        self.count = sum(1 for _ in points)
+
+    def query_segment(self, x0, y0, x1, y1):
+        return range(self.count)
+
+
+def make_scene(count, seed=1):
+    # A fresh Simulation holding the scene; the player stands still
+    rng = random.Random(seed)
+    sim = Simulation(seed=seed)
+    sim.player_max_hp = sim.player_current_hp = GOD_MODE_HP
+    for _ in range(count // 2):
+        sim.enemies.add(
+            x=rng.uniform(50, sim.screen_width - 50), y=rng.uniform(50, sim.screen_height - 50),
+            hp=sim.enemy_max_health
+        )
+    for _ in range(count - count // 2):
+        sim.projectiles.add(
+            x=rng.uniform(0, sim.screen_width), y=rng.uniform(0, sim.screen_height),
+            dx=rng.uniform(-8, 8), dy=rng.uniform(-8, 8)
+        )
+    # Untimed first step (the flow field search for the player's cell)
+    sim.step(TICK_MS, set())
+    sim.profiler.enable()
+    return sim
+
+
+def time_steps(count, frames, broadphase):
+    # Mean ms per step and in the collision phase, and the last end state
+    step_ms = 0.0
+    collision_ms = 0.0
+    for _ in range(frames):
+        sim = make_scene(count)
+        if not broadphase:
+            sim.enemy_grid = NoBroadphase()
+        start = time.perf_counter()
+        sim.step(TICK_MS, set())
+        step_ms += (time.perf_counter() - start) * 1000
+        collision_ms += sim.profiler.totals["collision"]
+    return step_ms / frames, collision_ms / frames, state_digest(sim)
+
+
+def main():
+    print(f"{'entities':>8}  {'scan step':>10}  {'scan coll':>10}  {'grid step':>10}  {'grid coll':>10}  {'speedup':>8}")
+    for count in (50, 500, 5000):
+        frames = max(1, 20000 // count)
+        scan_step, scan_ms, scan_state = time_steps(count, frames, broadphase=False)
+        grid_step, grid_ms, grid_state = time_steps(count, frames, broadphase=True)
+        # The broadphase must not change which enemy each shot hits
+        assert scan_state == grid_state
+        print(
+            f"{count:>8}  {scan_step:>10.3f}  {scan_ms:>10.3f}  {grid_step:>10.3f}  {grid_ms:>10.3f}  "
+            f"{scan_ms / grid_ms:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
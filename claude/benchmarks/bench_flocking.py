@@ -0,0 +1,103 @@
+# Shows what enemy separation does to frame time as a crowd closes in.
+#
+# 2000 enemies start spread over the screen and chase a player standing in
+# the middle, once moving straight (the old behaviour) and once with the
+# default Steering. Every tick also rebuilds the 64 px collision grid and
+# tests 500 player shots around the player against the enemies the grid
+# returns, like the collision pass does. Per window of ticks it prints the
+# mean milliseconds for movement and for the collision queries, the fullest
+# grid cell and the closest pair of enemies. Straight chasing piles everything into one cell,
+# so query cost climbs; with separation it stays flat.
+#
+#   python benchmarks/bench_flocking.py [--enemies 2000] [--ticks 600]
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from entities import EntityStore
+from kernels import default_kernel
+from spatial import SpatialGrid
+from steering import Steering
+
+SCREEN_WIDTH = 1920
+SCREEN_HEIGHT = 1080
+
+
+def make_crowd(count, seed):
+    rng = random.Random(seed)
+    enemies = EntityStore(extra_columns=(("level", "i"), ("telegraph", "q")))
+    for _ in range(count):
+        enemies.add(x=rng.uniform(0, SCREEN_WIDTH), y=rng.uniform(0, SCREEN_HEIGHT), hp=3)
+    shots = [
+        (SCREEN_WIDTH / 2 + rng.uniform(-300, 300), SCREEN_HEIGHT / 2 + rng.uniform(-300, 300))
+        for _ in range(500)
+    ]
+    return enemies, shots
+
+
+def closest_pair(enemies, grid):
+    # Smallest distance between two enemies (via the 64 px grid)
+    xs, ys = enemies.x, enemies.y
+    best = math.inf
+    for i in range(len(xs)):
+        for j in grid.query(xs[i], ys[i]):
+            if j != i:
+                best = min(best, math.hypot(xs[i] - xs[j], ys[i] - ys[j]))
+    return best
+
+
+def run(enemy_count, ticks, window, steering, seed):
+    kernel = default_kernel()
+    enemies, shots = make_crowd(enemy_count, seed)
+    grid = SpatialGrid(cell_size=64)
+    target_x, target_y = SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2
+    move_time = query_time = 0.0
+    rows = []
+    for tick in range(1, ticks + 1):
+        start = time.perf_counter()
+        if steering is None:
+            kernel.move_enemies(enemies, target_x, target_y, 2.5)
+        else:
+            kernel.flock_enemies(enemies, target_x, target_y, 2.5, steering)
+        middle = time.perf_counter()
+        grid.rebuild(zip(range(len(enemies)), enemies.x, enemies.y))
+        xs, ys = enemies.x, enemies.y
+        for x, y in shots:
+            for j in grid.query(x, y):
+                if (xs[j] - x) ** 2 + (ys[j] - y) ** 2 < 28 * 28:
+                    break
+        end = time.perf_counter()
+        move_time += middle - start
+        query_time += end - middle
+
+        if tick % window == 0:
+            fullest = max(len(bucket) for bucket in grid.cells.values())
+            sample_closest = closest_pair(enemies, grid) if fullest < 400 else 0.0
+            rows.append((tick, move_time * 1000 / window, query_time * 1000 / window, fullest, sample_closest))
+            move_time = query_time = 0.0
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--enemies", type=int, default=2000)
+    parser.add_argument("--ticks", type=int, default=600)
+    parser.add_argument("--window", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    for name, steering in (("straight chase", None), ("separation", Steering())):
+        print(f"{name} ({default_kernel().name} kernel, {args.enemies} enemies)")
+        print(f"{'ticks':>6}  {'move ms':>8}  {'query ms':>8}  {'total ms':>8}  {'fullest cell':>12}  {'closest pair':>12}")
+        for tick, move_ms, query_ms, fullest, closest in run(args.enemies, args.ticks, args.window, steering, args.seed):
+            print(f"{tick:6d}  {move_ms:8.3f}  {query_ms:8.3f}  {move_ms + query_ms:8.3f}  {fullest:12d}  {closest:12.1f}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
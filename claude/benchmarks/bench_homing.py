@@ -0,0 +1,98 @@
+# Times nearest-enemy lookups for homing shots at growing enemy counts.
+#
+# Compares a full scan of the enemy store with Quadtree.nearest() and
+# SpatialGrid.nearest() (each plus its once-per-tick rebuild, spread over
+# the shots) and times a whole Simulation.steer_homing() pass. The game
+# steers with the grid it already rebuilds each tick for collisions, so
+# steer_homing has no rebuild of its own; "rebuild ms" is that shared
+# rebuild. The scan grows linearly with the enemies, the others far slower.
+#
+#   python benchmarks/bench_homing.py [--shots 200]
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from entities import FLAG_HOMING
+from quadtree import Quadtree
+from simulation import HOMING_RANGE, Simulation
+
+
+def make_scene(enemy_count, shot_count, seed=3):
+    rng = random.Random(seed)
+    sim = Simulation(seed=seed)
+    sim.homing_level = 1
+    for _ in range(enemy_count):
+        sim.enemies.add(x=rng.uniform(50, 1870), y=rng.uniform(50, 1030), hp=3)
+    for _ in range(shot_count):
+        sim.projectiles.add(
+            x=rng.uniform(0, 1920), y=rng.uniform(0, 1080),
+            dx=rng.uniform(-8, 8), dy=rng.uniform(-8, 8), flags=FLAG_HOMING
+        )
+    return sim
+
+
+def scan_nearest(enemies, x, y):
+    xs, ys = enemies.x, enemies.y
+    best = -1
+    best_distance = HOMING_RANGE * HOMING_RANGE
+    for j in range(len(xs)):
+        distance = (xs[j] - x) ** 2 + (ys[j] - y) ** 2
+        if distance <= best_distance:
+            best = j
+            best_distance = distance
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shots", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(
+        f"{'enemies':>7}  {'scan us/shot':>12}  {'tree us/shot':>12}  {'grid us/shot':>12}  "
+        f"{'rebuild ms':>10}  {'steer_homing ms':>15}"
+    )
+    for count in (50, 200, 1000, 5000):
+        sim = make_scene(count, args.shots)
+        enemies, shots = sim.enemies, sim.projectiles
+        points = [(shots.x[i], shots.y[i]) for i in range(len(shots))]
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for x, y in points:
+                scan_nearest(enemies, x, y)
+        scan_us = (time.perf_counter() - start) / (args.repeat * len(points)) * 1e6
+
+        tree = Quadtree()
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            tree.rebuild(zip(range(len(enemies)), enemies.x, enemies.y))
+            for x, y in points:
+                tree.nearest(x, y, 1, HOMING_RANGE)
+        tree_us = (time.perf_counter() - start) / (args.repeat * len(points)) * 1e6
+
+        grid = sim.enemy_grid
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            grid.rebuild(zip(range(len(enemies)), enemies.x, enemies.y))
+        rebuild_ms = (time.perf_counter() - start) / args.repeat * 1000
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for x, y in points:
+                grid.nearest(x, y, enemies.x, enemies.y, HOMING_RANGE)
+        grid_us = ((time.perf_counter() - start) / args.repeat + rebuild_ms / 1000) / len(points) * 1e6
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            sim.steer_homing(1.0)
+        steer_ms = (time.perf_counter() - start) / args.repeat * 1000
+        print(f"{count:7d}  {scan_us:12.2f}  {tree_us:12.2f}  {grid_us:12.2f}  {rebuild_ms:10.3f}  {steer_ms:15.3f}")
+
+
+if __name__ == "__main__":
+    main()
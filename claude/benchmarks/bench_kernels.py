@@ -0,0 +1,122 @@
+# Compares the pure-Python and NumPy update kernels on a seeded scene.
+#
+# Both kernels are stepped through the same run (enemy chase, with and
+# without flocking and arena walls, projectile advance, wall and player
+# contact tests, off-screen culling and respawns) and the resulting entity
+# columns must match bit for bit. Timings are printed per tick.
+#
+# Then the whole seeded games of test_kernel_parity.py are played for
+# longer; the run fails at the first tick where the two kernels differ.
+#
+#   python benchmarks/bench_kernels.py
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arena import Arena
+from entities import EntityStore, FLAG_BOSS, FLAG_HOSTILE
+from kernels import NumpyKernel, PythonKernel, np
+from steering import Steering
+from test_kernel_parity import first_divergence
+
+SCREEN_WIDTH = 1920
+SCREEN_HEIGHT = 1080
+
+
+def make_scene(enemy_count, projectile_count, seed):
+    rng = random.Random(seed)
+    enemies = EntityStore(extra_columns=(("level", "i"), ("telegraph", "q")))
+    for _ in range(enemy_count):
+        flags = FLAG_BOSS if rng.random() < 0.01 else 0
+        enemies.add(x=rng.uniform(0, SCREEN_WIDTH), y=rng.uniform(0, SCREEN_HEIGHT), hp=3, flags=flags)
+    projectiles = EntityStore()
+    for _ in range(projectile_count):
+        add_projectile(projectiles, rng)
+    return enemies, projectiles, rng
+
+
+def add_projectile(projectiles, rng):
+    flags = FLAG_HOSTILE if rng.random() < 0.3 else 0
+    projectiles.add(
+        x=rng.uniform(0, SCREEN_WIDTH), y=rng.uniform(0, SCREEN_HEIGHT),
+        dx=rng.uniform(-12, 12), dy=rng.uniform(-12, 12), flags=flags
+    )
+
+
+def run(kernel, enemy_count, projectile_count, ticks, seed=7, steering=None, walls=False):
+    enemies, projectiles, rng = make_scene(enemy_count, projectile_count, seed)
+    arena = Arena(SCREEN_WIDTH, SCREEN_HEIGHT)
+    field = None
+    if walls:
+        arena.add_default_obstacles(SCREEN_WIDTH, SCREEN_HEIGHT)
+        field = arena.field
+    player_x, player_y = SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2
+    contacts = []
+    start = time.perf_counter()
+    for tick in range(ticks):
+        # Player wanders so the chase direction keeps changing
+        player_x += rng.choice((-5, 0, 5))
+        player_y += rng.choice((-5, 0, 5))
+        if field is not None:
+            field.update(player_x, player_y)
+        if steering is None:
+            kernel.move_enemies(enemies, player_x, player_y, 2.5 + tick * 0.001, field)
+        else:
+            kernel.flock_enemies(enemies, player_x, player_y, 2.5 + tick * 0.001, steering, field)
+        contacts.append(kernel.contact_indices(enemies, player_x, player_y, 45, 65))
+        kernel.advance_projectiles(projectiles)
+        wall_hits = kernel.wall_hits(projectiles, arena)
+        contacts.append(sorted(wall_hits.items()))
+        hits = kernel.hostile_hits(projectiles, player_x, player_y, 33)
+        gone = set(hits)
+        gone.update(wall_hits)
+        gone.update(kernel.offscreen_indices(projectiles, SCREEN_WIDTH, SCREEN_HEIGHT))
+        projectiles.remove_indices(gone)
+        for _ in range(len(gone)):
+            add_projectile(projectiles, rng)
+    elapsed = time.perf_counter() - start
+    state = [getattr(enemies, name).tobytes() for name in enemies.column_names]
+    state += [getattr(projectiles, name).tobytes() for name in projectiles.column_names]
+    return elapsed * 1000 / ticks, state, contacts
+
+
+def main():
+    if np is None:
+        print("NumPy is not installed; only the Python kernel is available")
+        return
+    ticks = 200
+    print(f"{'enemies':>8}  {'shots':>8}  {'flocking':>8}  {'walls':>6}  {'python ms':>10}  {'numpy ms':>10}")
+    for enemy_count, projectile_count in ((50, 50), (500, 500), (5000, 5000)):
+        for steering in (None, Steering()):
+            for walls in (False, True):
+                py_ms, py_state, py_contacts = run(
+                    PythonKernel(), enemy_count, projectile_count, ticks, steering=steering, walls=walls
+                )
+                np_ms, np_state, np_contacts = run(
+                    NumpyKernel(min_batch=0), enemy_count, projectile_count, ticks, steering=steering, walls=walls
+                )
+                # Both paths must leave the game in exactly the same state
+                assert py_state == np_state, "kernels diverged"
+                assert py_contacts == np_contacts, "contact tests diverged"
+                flocking = "yes" if steering else "no"
+                print(
+                    f"{enemy_count:>8}  {projectile_count:>8}  {flocking:>8}  {'yes' if walls else 'no':>6}  "
+                    f"{py_ms:>10.3f}  {np_ms:>10.3f}"
+                )
+    print("python and numpy kernels produced bit-identical state")
+
+    ticks = 3000
+    for seed in (1, 2, 3):
+        start = time.perf_counter()
+        tick = first_divergence(seed, ticks)
+        if tick is not None:
+            print(f"seed {seed}: python and numpy games diverged at tick {tick}")
+            raise SystemExit(1)
+        print(f"seed {seed}: {ticks} ticks identical on both kernels ({time.perf_counter() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
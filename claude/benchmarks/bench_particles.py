@@ -0,0 +1,88 @@
+# Per-frame cost of the effect particle system at its cap.
+#
+# Every frame emits a storm of effects (kills, hits, muzzle flashes and a
+# boss death every second) into a ParticleSystem and advances it one tick,
+# like a renderer does. Prints the mean and max milliseconds per frame for
+# emitting and updating, how full the ring is and how many live particles
+# were overwritten, for a few capacities. tracemalloc then checks that a
+# warmed-up system holds no more memory after emitting several hundred
+# thousand more particles.
+#
+#   python benchmarks/bench_particles.py [--frames 600]
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from particles import EFFECTS, ParticleSystem, np
+
+# Effects per frame (kind -> count) during the storm
+STORM = {"death": 6, "hit": 20, "muzzle": 4, "wall": 10}
+
+
+def storm_effects(rng, frame):
+    effects = []
+    for kind, count in STORM.items():
+        for _ in range(count):
+            effects.append((kind, rng.uniform(0, 1920), rng.uniform(0, 1080), rng.uniform(-1, 1), 0.0))
+    if frame % 60 == 0:
+        effects.append(("boss_death", 960.0, 540.0, 0.0, 0.0))
+    return effects
+
+
+def run(capacity, frames, seed=1):
+    rng = random.Random(seed)
+    particles = ParticleSystem(capacity, seed=seed)
+    emit_ms = []
+    update_ms = []
+    for frame in range(frames):
+        effects = storm_effects(rng, frame)
+        start = time.perf_counter()
+        particles.emit_effects(effects)
+        middle = time.perf_counter()
+        particles.update(1.0)
+        end = time.perf_counter()
+        emit_ms.append((middle - start) * 1000)
+        update_ms.append((end - middle) * 1000)
+    return particles, emit_ms, update_ms
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=600)
+    args = parser.parse_args()
+
+    per_frame = sum(EFFECTS[kind][0] * count for kind, count in STORM.items())
+    print(f"{per_frame}+ particles emitted per frame, update on {'NumPy' if np is not None else 'Python'}")
+    print(f"{'capacity':>8}  {'emit ms':>8}  {'update ms':>9}  {'max total':>9}  {'live':>6}  {'overwritten':>11}")
+    for capacity in (512, 2048, 4096, 16384):
+        particles, emit_ms, update_ms = run(capacity, args.frames)
+        worst = max(e + u for e, u in zip(emit_ms, update_ms))
+        print(
+            f"{capacity:8d}  {sum(emit_ms) / len(emit_ms):8.3f}  {sum(update_ms) / len(update_ms):9.3f}  "
+            f"{worst:9.3f}  {particles.live:6d}  {particles.overwritten:11d}"
+        )
+
+    # A warmed-up system must not hold more memory however long it runs
+    rng = random.Random(2)
+    particles = ParticleSystem(4096, seed=2)
+    for frame in range(args.frames):
+        particles.emit_effects(storm_effects(rng, frame))
+        particles.update(1.0)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for frame in range(args.frames * 4):
+        particles.emit_effects(storm_effects(rng, frame))
+        particles.update(1.0)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print()
+    print(f"memory held over {args.frames * 4} more frames: {after - before:+d} bytes")
+
+
+if __name__ == "__main__":
+    main()
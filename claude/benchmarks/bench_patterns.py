@@ -0,0 +1,111 @@
+# Measures the boss bullet pattern engine under a sustained bullet hell.
+#
+# First times building bursts from the trig tables against calling
+# math.cos/math.sin per bullet. Then runs the headless Simulation with
+# several level-N bosses standing around the arena, each looping its
+# barrage (patterns.BOSS_BARRAGES), while a god-mode player stands in the
+# middle. Per window of ticks it prints the live boss shots and the mean,
+# p99 and max tick time; the run passes if the live count reached the
+# target while every window's p99 stayed under the tick budget.
+#
+#   python benchmarks/bench_patterns.py [--bosses 6] [--level 4] [--target 2000]
+import argparse
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from entities import FLAG_BOSS
+from patterns import FIRST_BARRAGE_LEVEL, Ring, barrage_for_level, burst_velocities
+from simulation import Simulation, TICK_MS
+
+GOD_MODE_HP = 10**9
+
+
+def time_bursts(repeat=2000):
+    ring = Ring(count=48, speed=4, spin=3.75)
+    start = time.perf_counter()
+    for burst in range(repeat):
+        burst_velocities(ring, burst, 0)
+    table_us = (time.perf_counter() - start) * 1e6 / repeat
+
+    start = time.perf_counter()
+    for burst in range(repeat):
+        turn = math.radians(ring.spin * burst)
+        angles = [turn + 2 * math.pi * k / ring.count for k in range(ring.count)]
+        [math.cos(angle) * ring.speed for angle in angles], [math.sin(angle) * ring.speed for angle in angles]
+    trig_us = (time.perf_counter() - start) * 1e6 / repeat
+    return table_us, trig_us
+
+
+def start_hell(boss_count, level, obstacles, seed):
+    # Bosses in a circle around the player, none moving or using specials
+    sim = Simulation(seed=seed, obstacles=obstacles)
+    sim.scheduler.clear(sim.time_ms)
+    sim.spawn_timer = None
+    sim.player_max_hp = sim.player_current_hp = GOD_MODE_HP
+    sim.enemy_speed_multiplier = 0.0
+    barrage = barrage_for_level(level)
+    radius = min(sim.screen_width, sim.screen_height) * 0.4
+    for k in range(boss_count):
+        angle = 2 * math.pi * k / boss_count
+        handle = sim.enemies.add(
+            x=sim.player_x + math.cos(angle) * radius, y=sim.player_y + math.sin(angle) * radius,
+            hp=GOD_MODE_HP, flags=FLAG_BOSS, level=level
+        )
+        # Stagger the volleys so the bosses don't all play the same one
+        sim.schedule(0, sim.boss_barrage, handle, k % len(barrage), 0)
+    return sim
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bosses", type=int, default=6)
+    parser.add_argument("--level", type=int, default=4)
+    parser.add_argument("--ticks", type=int, default=1500)
+    parser.add_argument("--window", type=int, default=250)
+    parser.add_argument("--target", type=int, default=2000, help="live boss shots to sustain")
+    parser.add_argument("--budget-ms", type=float, default=TICK_MS)
+    parser.add_argument("--obstacles", action="store_true", help="keep the arena walls (they absorb shots)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    if barrage_for_level(args.level) is None:
+        parser.error(f"bosses below level {FIRST_BARRAGE_LEVEL} have no barrage")
+
+    table_us, trig_us = time_bursts()
+    print(f"48-bullet ring: {table_us:.1f} us from tables, {trig_us:.1f} us with math.cos/sin")
+    print()
+
+    sim = start_hell(args.bosses, args.level, args.obstacles, args.seed)
+    print(f"{args.bosses} level {args.level} bosses, {sim.kernel.name} kernel")
+    print(f"{'ticks':>6}  {'boss shots':>10}  {'mean ms':>8}  {'p99 ms':>8}  {'max ms':>8}")
+    tick_ms = []
+    peak = 0
+    worst_p99 = 0.0
+    for tick in range(1, args.ticks + 1):
+        start = time.perf_counter()
+        sim.step(TICK_MS, set())
+        tick_ms.append((time.perf_counter() - start) * 1000)
+        live = sim.projectiles.flagged
+        peak = max(peak, live)
+        if tick % args.window == 0:
+            window = sorted(tick_ms)
+            p99 = window[int(0.99 * (len(window) - 1))]
+            worst_p99 = max(worst_p99, p99)
+            print(f"{tick:6d}  {live:10d}  {sum(window) / len(window):8.3f}  {p99:8.3f}  {window[-1]:8.3f}")
+            tick_ms = []
+
+    print()
+    passed = peak >= args.target and worst_p99 < args.budget_ms
+    print(
+        f"peak {peak} live boss shots, worst p99 {worst_p99:.3f} ms: "
+        f"{'ok' if passed else 'FAIL'} (target {args.target} within {args.budget_ms:g} ms)"
+    )
+    if not passed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
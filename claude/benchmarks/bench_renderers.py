@@ -0,0 +1,91 @@
+# Compares the canvas (one item per entity) and photo (one PhotoImage
+# framebuffer) renderer backends across entity counts.
+#
+# Both draw the same seeded scene while every entity moves a little each
+# frame. Reports milliseconds per draw including Tk's redraw, the photo
+# renderer's split between rasterising and handing the frame to Tk, and the
+# faster backend at each count. Needs a display (Tk window) and NumPy.
+#
+#   python benchmarks/bench_renderers.py [--entities 50 500 5000] [--pixel-scale 2]
+import argparse
+import os
+import sys
+import time
+import tkinter as tk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_canvas_batch import populate
+from photo_renderer import PhotoRenderer
+from renderer import CanvasRenderer
+from simulation import Simulation
+
+
+def nudge(sim, step):
+    # Move everything so every item (or pixel) really changes
+    for store in (sim.enemies, sim.projectiles):
+        xs = store.x
+        for i in range(len(xs)):
+            xs[i] += step
+
+
+def measure(root, canvas, count, make_renderer, frames):
+    canvas.delete("all")
+    sim = Simulation(1280, 720, seed=1)
+    populate(sim, count)
+    renderer = make_renderer(canvas, sim)
+    renderer.draw()
+    root.update_idletasks()
+
+    total = 0.0
+    for frame in range(frames):
+        nudge(sim, 1 if frame % 2 else -1)
+        start = time.perf_counter()
+        renderer.draw()
+        root.update_idletasks()
+        total += time.perf_counter() - start
+    return total * 1000 / frames, renderer
+
+
+def raster_split(renderer, frames):
+    # Milliseconds per frame spent in rasterise() and in present()
+    raster = present = 0.0
+    for _ in range(frames):
+        start = time.perf_counter()
+        renderer.rasterise()
+        middle = time.perf_counter()
+        renderer.present()
+        present += time.perf_counter() - middle
+        raster += middle - start
+    return raster * 1000 / frames, present * 1000 / frames
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entities", type=int, nargs="+", default=[50, 200, 500, 1000, 2000, 5000])
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--pixel-scale", type=int, default=2)
+    args = parser.parse_args()
+
+    root = tk.Tk()
+    canvas = tk.Canvas(root, width=1280, height=720, bg="lightblue")
+    canvas.pack()
+
+    backends = (
+        ("canvas", CanvasRenderer),
+        ("photo", lambda canvas, sim: PhotoRenderer(canvas, sim, pixel_scale=args.pixel_scale)),
+    )
+    print(f"{'entities':>8}  {'canvas ms':>9}  {'photo ms':>8}  {'raster':>6}  {'present':>7}  faster")
+    for count in args.entities:
+        times = {}
+        renderers = {}
+        for name, make_renderer in backends:
+            times[name], renderers[name] = measure(root, canvas, count, make_renderer, args.frames)
+        raster, present = raster_split(renderers["photo"], args.frames)
+        faster = min(times, key=times.get)
+        print(f"{count:8d}  {times['canvas']:9.3f}  {times['photo']:8.3f}  {raster:6.3f}  {present:7.3f}  {faster}")
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# Times closing the shop with many live entities on the canvas.
+#
+# "rebuild" is the old close_shop: delete("all"), then recreate the HUD and
+# every world item. "tagged" is the current one: delete the shop overlay by
+# tag and restyle the player's bullets. Needs a display (Tk window).
+#
+#   python benchmarks/bench_shop_close.py [--entities 1000]
+import argparse
+import os
+import random
+import sys
+import time
+import tkinter as tk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import claudetest
+from entities import FLAG_HOSTILE
+
+
+class CountingTk:
+    # Wraps the Tcl interpreter to count Python -> Tcl round trips
+    def __init__(self, tk_app):
+        self.tk_app = tk_app
+        self.calls = 0
+
+    def call(self, *args):
+        self.calls += 1
+        return self.tk_app.call(*args)
+
+    def __getattr__(self, name):
+        return getattr(self.tk_app, name)
+
+
+def populate(sim, count, seed=1):
+    rng = random.Random(seed)
+    for _ in range(count // 2):
+        sim.enemies.add(x=rng.uniform(0, sim.screen_width), y=rng.uniform(0, sim.screen_height), hp=3)
+    for _ in range(count - count // 2):
+        flags = FLAG_HOSTILE if rng.random() < 0.3 else 0
+        sim.projectiles.add(x=rng.uniform(0, sim.screen_width), y=rng.uniform(0, sim.screen_height), flags=flags)
+
+
+def close_rebuild(game):
+    # The pre-tag close_shop
+    game.canvas.delete("all")
+    game.hud.create(game.sim)
+    game.renderer.rebuild()
+    game.renderer.draw()
+    game.canvas.unbind("<Button-1>")
+
+
+def close_tagged(game):
+    game.close_shop()
+
+
+def measure(game, close, trials):
+    counter = game.canvas.tk
+    total = 0.0
+    calls = 0
+    for _ in range(trials):
+        game.show_shop()
+        game.root.update_idletasks()
+        counter.calls = 0
+        start = time.perf_counter()
+        close(game)
+        game.root.update_idletasks()
+        total += time.perf_counter() - start
+        calls += counter.calls
+    return total * 1000 / trials, calls // trials
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entities", type=int, default=1000)
+    parser.add_argument("--trials", type=int, default=20)
+    args = parser.parse_args()
+
+    root = tk.Tk()
+    game = claudetest.Game(root)
+    game.start_loop = lambda: None  # keep the game paused while measuring
+    game.sim.game_over = True
+    game.canvas.tk = CountingTk(game.canvas.tk)
+    populate(game.sim, args.entities)
+    game.renderer.draw()
+
+    for name, close in (("rebuild", close_rebuild), ("tagged", close_tagged)):
+        ms, calls = measure(game, close, args.trials)
+        print(f"{name:>8}: {ms:8.3f} ms per close, {calls} Tcl calls ({args.entities} entities)")
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+# Benchmark harness for the game loop.
+#
+# Runs the headless Simulation through seeded scenarios and reports per-tick
+# timing (mean, p50, p99, max), ticks per second and peak RSS. Results can be
+# written as JSON and compared against a previous run:
+#
+#   python benchmarks/harness.py --out before.json
+#   python benchmarks/harness.py --out after.json --compare before.json
+#   python benchmarks/harness.py --scenario crowd --enemies 2000 --projectiles 2000
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from entities import FLAG_HOSTILE
+from limits import LoadGovernor
+from profiler import PHASES
+from simulation import Simulation, TICK_MS, UPGRADES, demo_policy
+
+# Large enough that only a boss contact can end a run
+GOD_MODE_HP = 10**9
+
+
+def populate(sim, rng, enemies, projectiles):
+    # Scatter enemies and moving projectiles (30% boss shots) over the arena
+    for _ in range(enemies):
+        sim.enemies.add(
+            x=rng.uniform(50, sim.screen_width - 50), y=rng.uniform(50, sim.screen_height - 50),
+            hp=sim.enemy_max_health
+        )
+    for _ in range(projectiles):
+        flags = FLAG_HOSTILE if rng.random() < 0.3 else 0
+        sim.projectiles.add(
+            x=rng.uniform(0, sim.screen_width), y=rng.uniform(0, sim.screen_height),
+            dx=rng.uniform(-8, 8), dy=rng.uniform(-8, 8), flags=flags
+        )
+
+
+def spawn_boss(sim, level):
+    sim.boss_number = level
+    sim.last_boss_spawn_kills = sim.enemies_killed
+    sim.spawn_boss()
+
+
+def setup_crowd(sim, rng, options):
+    # N enemies and M projectiles, optional boss of level k
+    populate(sim, rng, options["enemies"], options["projectiles"])
+    if options["boss_level"] is not None:
+        spawn_boss(sim, options["boss_level"])
+
+
+def setup_boss_rush(sim, rng, options):
+    # Second-boss rush attack (8-way burst) as often as it can telegraph.
+    # Nothing moves towards the player, who waits in a corner.
+    sim.player_x, sim.player_y = 150, 150
+    sim.enemy_speed_multiplier = 0.0
+    sim.boss_special_cooldown = 1000
+    spawn_boss(sim, max(1, options["boss_level"] or 1))
+    populate(sim, rng, options["enemies"], options["projectiles"])
+
+
+def setup_summon_spam(sim, rng, options):
+    # Third-boss summons every half second and the summons pile up. Nothing
+    # moves, the player shoots back from the opposite corner.
+    sim.player_x, sim.player_y = 150, sim.screen_height - 150
+    sim.enemy_speed_multiplier = 0.0
+    sim.boss_special_cooldown = 500
+    spawn_boss(sim, max(2, options["boss_level"] or 2))
+    boss = sim.enemies.index_of[sim.current_boss]
+    sim.enemies.hp[boss] = float(GOD_MODE_HP)
+    sim.enemies.x[boss], sim.enemies.y[boss] = sim.screen_width - 300, 300
+    populate(sim, rng, options["enemies"], options["projectiles"])
+
+
+def setup_overload(sim, rng, options):
+    # Slow bullets, bazooka level 2 and a third boss summoning every 250 ms:
+    # entity counts climb until the caps (and the governor, if enabled) hold
+    # them. The boss is parked out of the player's reach.
+    sim.player_x, sim.player_y = 150, sim.screen_height - 150
+    sim.bullet_speed_multiplier = 0.1
+    sim.enemy_speed_multiplier = 0.0
+    sim.boss_special_cooldown = 250
+    spawn_boss(sim, max(2, options["boss_level"] or 2))
+    boss = sim.enemies.index_of[sim.current_boss]
+    sim.enemies.hp[boss] = float(GOD_MODE_HP)
+    sim.enemies.x[boss], sim.enemies.y[boss] = sim.screen_width - 300, 300
+    populate(sim, rng, options["enemies"], options["projectiles"])
+
+
+def setup_wave_escalation(sim, rng, options):
+    # Long run where add_test_kills pushes the game through the waves
+    populate(sim, rng, options["enemies"], options["projectiles"])
+
+
+# name -> (setup, default ticks, default options, test kills added every N ticks)
+SCENARIOS = {
+    "crowd": (setup_crowd, 600, {"enemies": 500, "projectiles": 500}, 0),
+    "boss_rush": (setup_boss_rush, 1200, {"enemies": 0, "projectiles": 0, "boss_level": 1}, 0),
+    "summon_spam": (setup_summon_spam, 1500, {"enemies": 0, "projectiles": 0, "boss_level": 2}, 0),
+    "overload": (setup_overload, 3000, {"enemies": 0, "projectiles": 0, "boss_level": 2}, 0),
+    "wave_escalation": (setup_wave_escalation, 6000, {"enemies": 0, "projectiles": 0}, 30),
+}
+
+
+def start_scenario(name, seed, options, profile=False):
+    rng = random.Random(seed)
+    sim = Simulation(seed=seed, obstacles=options["obstacles"])
+    sim.profiler.enable(profile)
+    sim.player_max_hp = sim.player_current_hp = GOD_MODE_HP
+    sim.bazooka_level = options["bazooka_level"]
+    for weight in ("separation", "cohesion"):
+        if options[weight] is not None:
+            setattr(sim.steering, weight, options[weight])
+    SCENARIOS[name][0](sim, rng, options)
+    return sim
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def peak_rss_kb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def run_scenario(name, seed=1, ticks=None, profile=False, budget_ms=None, **overrides):
+    setup, default_ticks, defaults, kill_interval = SCENARIOS[name]
+    options = {
+        "enemies": 0, "projectiles": 0, "boss_level": None, "bazooka_level": 2,
+        "separation": None, "cohesion": None, "obstacles": True,
+    }
+    options.update(defaults)
+    options.update({key: value for key, value in overrides.items() if value is not None})
+    ticks = ticks or default_ticks
+
+    sim = start_scenario(name, seed, options, profile)
+    governor = LoadGovernor(budget_ms) if budget_ms else None
+    phase_ms = dict.fromkeys(PHASES, 0.0)
+    tick_ms = []
+    shops = 0
+    deaths = 0
+    peak_entities = 0
+    for tick in range(ticks):
+        if sim.shop_open:
+            sim.buy_upgrade(UPGRADES[shops % len(UPGRADES)])
+            shops += 1
+        elif sim.game_over:
+            # Only a boss contact gets here; start the scenario over
+            deaths += 1
+            sim = start_scenario(name, seed + deaths, options, profile)
+        if kill_interval and tick % kill_interval == 0:
+            sim.add_test_kills()
+
+        inputs = demo_policy(sim, tick)
+        start = time.perf_counter()
+        sim.step(TICK_MS, inputs)
+        tick_ms.append((time.perf_counter() - start) * 1000)
+        if governor is not None:
+            sim.set_load_level(governor.observe(tick_ms[-1]))
+        peak_entities = max(peak_entities, len(sim.enemies) + len(sim.projectiles))
+        if profile:
+            for phase in PHASES:
+                phase_ms[phase] += sim.profiler.totals[phase]
+            sim.profiler.end_frame(len(sim.enemies), len(sim.projectiles))
+
+    total_ms = sum(tick_ms)
+    ordered = sorted(tick_ms)
+    result = {
+        "ticks": ticks,
+        "seed": seed,
+        "options": options,
+        "mean_ms": total_ms / ticks,
+        "p50_ms": percentile(ordered, 0.50),
+        "p99_ms": percentile(ordered, 0.99),
+        "max_ms": ordered[-1],
+        "ticks_per_sec": ticks / (total_ms / 1000) if total_ms else None,
+        "peak_rss_kb": peak_rss_kb(),
+        "peak_entities": peak_entities,
+        "final": {
+            "kills": sim.enemies_killed,
+            "wave": sim.wave_number,
+            "bosses": sim.boss_number,
+            "shops": shops,
+            "deaths": deaths,
+            "load_level": sim.load_level,
+        },
+        "limits": dict(sim.limits.counters),
+    }
+    if profile:
+        result["phase_mean_ms"] = {phase: ms / ticks for phase, ms in phase_ms.items()}
+    return result
+
+
+def print_result(name, result):
+    print(
+        f"{name:<16} mean {result['mean_ms']:7.3f} ms  p50 {result['p50_ms']:7.3f}  "
+        f"p99 {result['p99_ms']:7.3f}  max {result['max_ms']:8.3f}  "
+        f"{result['ticks_per_sec'] or 0:8.0f} ticks/s  peak {result['peak_entities']:5d} entities  "
+        f"rss {result['peak_rss_kb']} KB"
+    )
+    counters = {key: value for key, value in result.get("limits", {}).items() if value}
+    if counters:
+        print("    " + "  ".join(f"{key} {value}" for key, value in counters.items()))
+    if "phase_mean_ms" in result:
+        print("    " + "  ".join(f"{phase} {ms:.4f}" for phase, ms in result["phase_mean_ms"].items() if ms))
+
+
+def print_comparison(old, new):
+    # Per-scenario change of the timing numbers, old -> new
+    print()
+    print("change vs baseline (negative is faster):")
+    for name, result in new["scenarios"].items():
+        before = old.get("scenarios", {}).get(name)
+        if before is None:
+            continue
+        changes = []
+        for key in ("mean_ms", "p50_ms", "p99_ms", "max_ms"):
+            if before[key]:
+                changes.append(f"{key[:-3]} {100 * (result[key] - before[key]) / before[key]:+6.1f}%")
+        print(f"{name:<16} " + "  ".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the headless game loop.")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="scenario to run (repeatable, default all)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--ticks", type=int, help="override the scenario's tick count")
+    parser.add_argument("--enemies", type=int, help="extra enemies at the start")
+    parser.add_argument("--projectiles", type=int, help="extra projectiles at the start")
+    parser.add_argument("--boss-level", type=int, help="spawn a boss of this level (0 = first boss)")
+    parser.add_argument("--bazooka-level", type=int, help="player bazooka level (default 2)")
+    parser.add_argument("--separation", type=float, help="enemy separation weight (0 with --cohesion 0 = straight chase)")
+    parser.add_argument("--cohesion", type=float, help="enemy cohesion weight")
+    parser.add_argument("--no-obstacles", action="store_true", help="run in an open arena with no walls")
+    parser.add_argument("--profile", action="store_true", help="also report mean time per tick phase")
+    parser.add_argument("--budget-ms", type=float, help="run a LoadGovernor with this tick budget")
+    parser.add_argument("--out", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="JSON file from an earlier run to compare against")
+    args = parser.parse_args()
+
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "kernel": Simulation().kernel.name,
+        "scenarios": {},
+    }
+    for name in args.scenario or list(SCENARIOS):
+        result = run_scenario(
+            name, seed=args.seed, ticks=args.ticks,
+            enemies=args.enemies, projectiles=args.projectiles,
+            boss_level=args.boss_level, bazooka_level=args.bazooka_level,
+            separation=args.separation, cohesion=args.cohesion,
+            obstacles=False if args.no_obstacles else None,
+            profile=args.profile, budget_ms=args.budget_ms,
+        )
+        results["scenarios"][name] = result
+        print_result(name, result)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(json.load(f), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# Headless soak run checking that the Python heap stays bounded.
+#
+# Runs the Simulation with the demo player (god mode) for many waves, adding
+# test kills so a new wave starts every --ticks-per-wave ticks and
+# answering every shop, with a LeakAuditor (audit.py) diffing tracemalloc
+# snapshots at each wave change. After the warm-up waves the heap should
+# stop growing: the run fails if it grew more than --max-growth-kb per wave
+# on average over the second half. The canvas side of the auditor needs a
+# display; run the game with --audit for that.
+#
+#   python benchmarks/soak_memory.py [--waves 60] [--ticks-per-wave 300]
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audit import LeakAuditor
+from simulation import Simulation, TICK_MS, UPGRADES, demo_policy
+
+GOD_MODE_HP = 10**9
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--waves", type=int, default=60)
+    parser.add_argument("--ticks-per-wave", type=int, default=300)
+    parser.add_argument("--max-growth-kb", type=float, default=8.0, help="allowed mean heap growth per wave")
+    parser.add_argument("--verbose", action="store_true", help="print the source lines that grew each wave")
+    parser.add_argument("--csv", help="write the per-wave rows to this file")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    sim = Simulation(seed=args.seed)
+    sim.player_max_hp = sim.player_current_hp = GOD_MODE_HP
+    auditor = LeakAuditor(None, None, log=print if args.verbose else lambda line: None)
+    auditor.start()
+    shops = 0
+    tick = 0
+    start = time.perf_counter()
+    print(f"{'wave':>5}  {'ticks':>7}  {'enemies':>7}  {'shots':>6}  {'heap KB':>9}  {'growth KB':>9}")
+    while sim.wave_number <= args.waves:
+        if sim.shop_open:
+            sim.buy_upgrade(UPGRADES[shops % len(UPGRADES)])
+            shops += 1
+        elif sim.game_over:
+            # A boss contact still ends a god-mode run
+            sim.reset(sim.rng.randrange(2**32))
+            sim.player_max_hp = sim.player_current_hp = GOD_MODE_HP
+        elif tick and tick % args.ticks_per_wave == 0:
+            sim.add_test_kills()
+        sim.step(TICK_MS, demo_policy(sim, tick))
+        tick += 1
+        waves_seen = len(auditor.rows)
+        auditor.frame(sim.wave_number)
+        if len(auditor.rows) > waves_seen:
+            wave, _, _, _, heap_bytes, growth = auditor.rows[-1]
+            print(
+                f"{wave:5d}  {tick:7d}  {len(sim.enemies):7d}  {len(sim.projectiles):6d}  "
+                f"{heap_bytes / 1024:9.1f}  {growth / 1024:+9.1f}"
+            )
+    auditor.stop()
+    elapsed = time.perf_counter() - start
+    if args.csv:
+        auditor.write_csv(args.csv)
+
+    # Later waves only: the first ones still fill caches and grow the stores
+    settled = [growth for *_, growth in auditor.rows[len(auditor.rows) // 2:]]
+    mean_kb = sum(settled) / len(settled) / 1024
+    print()
+    print(f"{tick} ticks in {elapsed:.1f}s, {shops} shops")
+    passed = mean_kb <= args.max_growth_kb
+    print(
+        f"mean heap growth over the last {len(settled)} waves: {mean_kb:+.2f} KB/wave "
+        f"{'ok' if passed else 'FAIL'} (limit {args.max_growth_kb:g} KB)"
+    )
+    if not passed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+from array import array
+
+# Entity flag bits
+FLAG_BOSS = 1      # enemy is a boss
+FLAG_HOSTILE = 2   # projectile was fired by a boss and hurts the player
+FLAG_HOMING = 4    # player projectile steers towards the nearest enemy
+
+
+class EntityStore:
+    # Struct-of-arrays storage for enemies and projectiles.
+    #
+    # Every attribute lives in its own typed array column, so an entity costs a
+    # few packed machine words instead of a list of boxed objects. Entities are
+    # kept densely packed: removing one moves the last entity into its slot
+    # (O(1) swap-remove). Because dense indices change on removal, callers that
+    # need to refer to an entity later (delayed boss attacks, the current boss)
+    # hold on to its handle, which never changes while the entity is alive.
+    #
+    # `flagged` counts the entities whose flags have `counted_flag` set, kept
+    # up to date on add and remove so callers never scan the flags column.
+    # That bit must be set when an entity is added and never changed after.
+    BASE_COLUMNS = (
+        ("x", "d"),
+        ("y", "d"),
+        ("dx", "d"),
+        ("dy", "d"),
+        ("hp", "d"),
+        ("flags", "B"),
+        ("view", "q"),  # renderer-owned item id, 0 until drawn
+        ("drawn_x", "d"),  # renderer-owned position the item was last drawn at
+        ("drawn_y", "d"),
+    )
+    # Columns that belong to the renderer, not to the game state
+    RENDER_COLUMNS = ("view", "drawn_x", "drawn_y")
+
+    def __init__(self, extra_columns=(), counted_flag=0):
+        self.column_names = []
+        for name, typecode in self.BASE_COLUMNS + tuple(extra_columns):
+            setattr(self, name, array(typecode))
+            self.column_names.append(name)
+        self.handles = array("q")  # dense index -> handle
+        self.index_of = {}  # handle -> dense index
+        self.next_handle = 1
+        self.counted_flag = counted_flag
+        self.flagged = 0
+        self.released = []  # view ids of removed entities, drained by the renderer
+
+    def __len__(self):
+        return len(self.handles)
+
+    def add(self, **values):
+        # Append a new entity and return its handle. Columns not given are 0.
+        for name in self.column_names:
+            getattr(self, name).append(values.get(name, 0))
+        if values.get("flags", 0) & self.counted_flag:
+            self.flagged += 1
+        handle = self.next_handle
+        self.next_handle += 1
+        self.index_of[handle] = len(self.handles)
+        self.handles.append(handle)
+        return handle
+
+    def add_many(self, count, **values):
+        # Append `count` entities at once. Each value is either one number for
+        # all of them or a sequence of `count` numbers. Returns their handles.
+        for name in self.column_names:
+            column = getattr(self, name)
+            value = values.get(name, 0)
+            if isinstance(value, (int, float)):
+                column.extend(array(column.typecode, [value]) * count)
+            else:
+                column.extend(value)
+        flags = values.get("flags", 0)
+        if self.counted_flag:
+            if isinstance(flags, int):
+                self.flagged += count if flags & self.counted_flag else 0
+            else:
+                self.flagged += sum(1 for value in flags if value & self.counted_flag)
+        first = len(self.handles)
+        handles = range(self.next_handle, self.next_handle + count)
+        self.next_handle += count
+        self.index_of.update(zip(handles, range(first, first + count)))
+        self.handles.extend(handles)
+        return handles
+
+    def alive(self, handle):
+        return handle in self.index_of
+
+    def remove(self, handle):
+        self.remove_at(self.index_of[handle])
+
+    def remove_at(self, index):
+        # Swap-remove: move the last entity into the freed slot
+        last = len(self.handles) - 1
+        removed_handle = self.handles[index]
+        if self.flags[index] & self.counted_flag:
+            self.flagged -= 1
+        if self.view[index]:
+            self.released.append(self.view[index])
+        if index != last:
+            for name in self.column_names:
+                column = getattr(self, name)
+                column[index] = column[last]
+            moved_handle = self.handles[last]
+            self.handles[index] = moved_handle
+            self.index_of[moved_handle] = index
+        for name in self.column_names:
+            getattr(self, name).pop()
+        self.handles.pop()
+        del self.index_of[removed_handle]
+
+    def remove_indices(self, indices):
+        # Remove several entities by dense index. Going from the highest index
+        # down keeps the remaining indices valid while swapping.
+        for index in sorted(indices, reverse=True):
+            self.remove_at(index)
+
+    def forget_views(self):
+        # Drop every renderer item id, e.g. after the canvas was cleared
+        view = self.view
+        for i in range(len(view)):
+            view[i] = 0
+        del self.released[:]
+
+    def clear(self):
+        self.released.extend(view for view in self.view if view)
+        for name in self.column_names:
+            del getattr(self, name)[:]
+        del self.handles[:]
+        self.index_of.clear()
+        self.flagged = 0
+
+    def recount(self):
+        # Recompute `flagged` after the columns were filled directly
+        counted = self.counted_flag
+        self.flagged = sum(1 for flags in self.flags if flags & counted) if counted else 0
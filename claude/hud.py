@@ -0,0 +1,91 @@
+class Hud:
+    # Kill, wave and HP counters plus the "+20 Kills" testing button.
+    #
+    # Changing canvas text makes Tk lay it out again, so update() only touches
+    # a text item when the value it shows has actually changed.
+    def __init__(self, canvas, screen_width, on_test_click):
+        self.canvas = canvas
+        self.screen_width = screen_width
+        self.on_test_click = on_test_click
+
+    def create(self, sim):
+        # Create the HUD items showing the current state of sim
+
+        # Create kill counter text
+        self.kill_counter_text = self.canvas.create_text(
+            100, 30,
+            text=f"Kills: {sim.enemies_killed}",
+            font=("Arial", 28, "bold"),
+            fill="white",
+            anchor="w"
+        )
+
+        # Create wave counter text
+        self.wave_counter_text = self.canvas.create_text(
+            100, 65,
+            text=f"Wave: {sim.wave_number}",
+            font=("Arial", 28, "bold"),
+            fill="white",
+            anchor="w"
+        )
+
+        # Create HP counter text
+        self.hp_counter_text = self.canvas.create_text(
+            100, 100,
+            text=f"HP: {sim.player_current_hp}/{sim.player_max_hp}",
+            font=("Arial", 28, "bold"),
+            fill=self.hp_color(sim),
+            anchor="w"
+        )
+
+        # Create testing button (adds 20 kills)
+        test_button_x = self.screen_width - 150
+        test_button_y = 50
+        self.test_button = self.canvas.create_rectangle(
+            test_button_x - 80, test_button_y - 25,
+            test_button_x + 80, test_button_y + 25,
+            fill="purple", outline="white", width=2
+        )
+        self.test_button_text = self.canvas.create_text(
+            test_button_x, test_button_y,
+            text="+20 Kills",
+            font=("Arial", 18, "bold"),
+            fill="white"
+        )
+
+        # Bind click event for test button
+        self.canvas.tag_bind(self.test_button, "<Button-1>", self.on_test_click)
+        self.canvas.tag_bind(self.test_button_text, "<Button-1>", self.on_test_click)
+
+        # Values currently on screen
+        self.shown_kills = sim.enemies_killed
+        self.shown_wave = sim.wave_number
+        self.shown_hp = (sim.player_current_hp, sim.player_max_hp)
+
+    def items(self):
+        # Every canvas item of the HUD (see audit.py)
+        return [
+            self.kill_counter_text, self.wave_counter_text, self.hp_counter_text,
+            self.test_button, self.test_button_text,
+        ]
+
+    def hp_color(self, sim):
+        # Green at full health, yellow when hurt, red on the last hit point
+        if sim.player_current_hp == sim.player_max_hp:
+            return "green"
+        return "yellow" if sim.player_current_hp > 1 else "red"
+
+    def update(self, sim):
+        # Push only the values that changed since the last update
+        if sim.enemies_killed != self.shown_kills:
+            self.shown_kills = sim.enemies_killed
+            self.canvas.itemconfig(self.kill_counter_text, text=f"Kills: {sim.enemies_killed}")
+
+        if sim.wave_number != self.shown_wave:
+            self.shown_wave = sim.wave_number
+            self.canvas.itemconfig(self.wave_counter_text, text=f"Wave: {sim.wave_number}")
+
+        hp = (sim.player_current_hp, sim.player_max_hp)
+        if hp != self.shown_hp:
+            self.shown_hp = hp
+            self.canvas.itemconfig(self.hp_counter_text, text=f"HP: {hp[0]}/{hp[1]}", fill=self.hp_color(sim))
@@ -0,0 +1,432 @@
+import math
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, the pure-Python kernel always works
+    np = None
+
+from entities import FLAG_BOSS, FLAG_HOSTILE
+from spatial import SpatialGrid
+
+
+class PythonKernel:
+    # Per-tick movement, contact and culling passes over an EntityStore.
+    # Every pass works on whole columns, so the NumPy kernel below can do the
+    # same thing as batched array operations. Both kernels do the same float
+    # operations in the same order and therefore produce bit-identical state.
+    name = "python"
+
+    def move_enemies(self, enemies, target_x, target_y, speed, field=None):
+        # Move every enemy `speed` pixels straight towards the target, or
+        # towards its next cell of `field` (an arena.FlowField) when given.
+        # With a field, no move ends inside a wall (see settle_enemy).
+        xs, ys = enemies.x, enemies.y
+        for i in range(len(xs)):
+            old_x = xs[i]
+            old_y = ys[i]
+            if field is not None:
+                goal_x, goal_y = field.waypoint(old_x, old_y, target_x, target_y)
+            else:
+                goal_x, goal_y = target_x, target_y
+            dx = goal_x - old_x
+            dy = goal_y - old_y
+            distance = math.sqrt(dx * dx + dy * dy)
+            if distance > 0:
+                xs[i] += (dx / distance) * speed
+                ys[i] += (dy / distance) * speed
+                if field is not None:
+                    self.settle_enemy(field.arena, xs, ys, i, old_x, old_y)
+
+    def settle_enemy(self, arena, xs, ys, i, old_x, old_y):
+        # Enemy i just moved from (old_x, old_y). If that put its centre in a
+        # wall cell, slide along the wall like the player does: keep the x
+        # move, else the y move, else stay put. An enemy already inside a
+        # wall (e.g. placed there) moves freely so it can walk out.
+        if not arena.point_blocked(xs[i], ys[i]) or arena.point_blocked(old_x, old_y):
+            return
+        if not arena.point_blocked(xs[i], old_y):
+            ys[i] = old_y
+        elif not arena.point_blocked(old_x, ys[i]):
+            xs[i] = old_x
+        else:
+            xs[i] = old_x
+            ys[i] = old_y
+
+    def flock_enemies(self, enemies, target_x, target_y, speed, steering, field=None):
+        # Move every enemy by its Steering direction (chase, separation and
+        # cohesion). All directions are worked out from the positions at the
+        # start of the pass, then applied. With a `field` the chase heads for
+        # the enemy's next flow field cell instead of the target.
+        xs, ys, flags = enemies.x, enemies.y, enemies.flags
+        radius = steering.radius
+        limit = radius * radius
+        separation_scale = steering.separation * radius
+        cohesion_scale = steering.cohesion / radius
+        grid = SpatialGrid(cell_size=radius)
+        grid.rebuild(zip(range(len(xs)), xs, ys))
+
+        steps = []
+        for i in range(len(xs)):
+            x = xs[i]
+            y = ys[i]
+            if field is not None:
+                goal_x, goal_y = field.waypoint(x, y, target_x, target_y)
+            else:
+                goal_x, goal_y = target_x, target_y
+            dx = goal_x - x
+            dy = goal_y - y
+            distance = math.sqrt(dx * dx + dy * dy)
+            if distance > 0:
+                chase_x = dx / distance
+                chase_y = dy / distance
+            else:
+                chase_x = chase_y = 0.0
+            if flags[i] & FLAG_BOSS:
+                steps.append((chase_x, chase_y))
+                continue
+
+            # Neighbours in cell order, store order within a cell
+            push_x = push_y = pull_x = pull_y = 0.0
+            count = 0
+            for j in grid.query(x, y):
+                ox = x - xs[j]
+                oy = y - ys[j]
+                d2 = ox * ox + oy * oy
+                if d2 >= limit or j == i:
+                    continue
+                if d2 == 0:
+                    # Exactly stacked: split them apart along x
+                    ox = 1.0 if i > j else -1.0
+                    oy = 0.0
+                    d2 = 1.0
+                push_x += ox / d2
+                push_y += oy / d2
+                pull_x -= ox
+                pull_y -= oy
+                count += 1
+
+            step_x = chase_x * steering.chase + push_x * separation_scale
+            step_y = chase_y * steering.chase + push_y * separation_scale
+            if count:
+                step_x += pull_x / count * cohesion_scale
+                step_y += pull_y / count * cohesion_scale
+            length = math.sqrt(step_x * step_x + step_y * step_y)
+            if length > 1:
+                step_x /= length
+                step_y /= length
+            steps.append((step_x, step_y))
+
+        for i, (step_x, step_y) in enumerate(steps):
+            old_x = xs[i]
+            old_y = ys[i]
+            xs[i] += step_x * speed
+            ys[i] += step_y * speed
+            if field is not None:
+                self.settle_enemy(field.arena, xs, ys, i, old_x, old_y)
+
+    def contact_indices(self, enemies, target_x, target_y, radius, boss_radius):
+        # Indices of enemies touching the target, in store order
+        xs, ys, flags = enemies.x, enemies.y, enemies.flags
+        hits = []
+        for i in range(len(xs)):
+            dx = target_x - xs[i]
+            dy = target_y - ys[i]
+            limit = boss_radius if flags[i] & FLAG_BOSS else radius
+            if math.sqrt(dx * dx + dy * dy) < limit:
+                hits.append(i)
+        return hits
+
+    def advance_projectiles(self, projectiles, scale=1.0):
+        # Velocities are per tick; scale stretches them for longer steps
+        xs, ys, dxs, dys = projectiles.x, projectiles.y, projectiles.dx, projectiles.dy
+        for i in range(len(xs)):
+            xs[i] += dxs[i] * scale
+            ys[i] += dys[i] * scale
+
+    def hostile_hits(self, projectiles, target_x, target_y, radius):
+        # Indices of boss projectiles touching the target, in store order
+        xs, ys, flags = projectiles.x, projectiles.y, projectiles.flags
+        hits = []
+        for i in range(len(xs)):
+            if flags[i] & FLAG_HOSTILE:
+                dx = xs[i] - target_x
+                dy = ys[i] - target_y
+                if math.sqrt(dx * dx + dy * dy) < radius:
+                    hits.append(i)
+        return hits
+
+    def wall_hits(self, store, arena, scale=1.0):
+        # {index: arena.segment_hit fraction} for entities whose move this
+        # tick (dx, dy times scale, ending at x, y) ran into a wall
+        hits = {}
+        if not arena.obstacles:
+            return hits
+        size = arena.cell_size
+        xs, ys, dxs, dys = store.x, store.y, store.dx, store.dy
+        for i in range(len(xs)):
+            x = xs[i]
+            y = ys[i]
+            start_x = x - dxs[i] * scale
+            start_y = y - dys[i] * scale
+            if x // size == start_x // size and y // size == start_y // size:
+                # Stayed inside one cell: only that cell can be a wall
+                index = arena.cell_index(x, y)
+                if index >= 0 and arena.blocked[index]:
+                    hits[i] = 0.0
+                continue
+            t = arena.segment_hit(start_x, start_y, x, y)
+            if t is not None:
+                hits[i] = t
+        return hits
+
+    def offscreen_indices(self, store, width, height):
+        xs, ys = store.x, store.y
+        return [i for i in range(len(xs)) if xs[i] < 0 or xs[i] > width or ys[i] < 0 or ys[i] > height]
+
+
+class NumpyKernel(PythonKernel):
+    # Same passes as PythonKernel, run as array operations on zero-copy NumPy
+    # views of the store columns. Small batches go through the Python loops,
+    # where NumPy's per-call overhead would dominate.
+    name = "numpy"
+
+    def __init__(self, min_batch=32):
+        # Empty stores always take the Python path (some reductions have no
+        # value for zero entities)
+        self.min_batch = max(1, min_batch)
+
+    def move_enemies(self, enemies, target_x, target_y, speed, field=None):
+        if len(enemies) < self.min_batch:
+            return PythonKernel.move_enemies(self, enemies, target_x, target_y, speed, field)
+        xs = np.frombuffer(enemies.x, dtype=np.float64)
+        ys = np.frombuffer(enemies.y, dtype=np.float64)
+        old_x = xs.copy()
+        old_y = ys.copy()
+        goal_x, goal_y = self.waypoints(xs, ys, target_x, target_y, field)
+        dx = goal_x - xs
+        dy = goal_y - ys
+        distance = np.sqrt(dx * dx + dy * dy)
+        moving = distance > 0
+        distance = distance[moving]
+        xs[moving] += (dx[moving] / distance) * speed
+        ys[moving] += (dy[moving] / distance) * speed
+        if field is not None:
+            self.settle_enemies(field.arena, xs, ys, old_x, old_y)
+
+    def blocked_at(self, arena, xs, ys):
+        # Arena.point_blocked for every (xs[i], ys[i]) at once
+        col = xs // arena.cell_size
+        row = ys // arena.cell_size
+        inside = (col >= 0) & (col < arena.cols) & (row >= 0) & (row < arena.rows)
+        index = np.where(inside, row * arena.cols + col, 0).astype(np.int64)
+        return inside & (np.frombuffer(arena.blocked, dtype=np.uint8)[index] != 0)
+
+    def settle_enemies(self, arena, xs, ys, old_x, old_y):
+        # PythonKernel.settle_enemy for every enemy at once
+        stuck = self.blocked_at(arena, xs, ys) & ~self.blocked_at(arena, old_x, old_y)
+        if not stuck.any():
+            return
+        keep_x = stuck & ~self.blocked_at(arena, xs, old_y)
+        keep_y = stuck & ~keep_x & ~self.blocked_at(arena, old_x, ys)
+        revert_y = keep_x | (stuck & ~keep_y)
+        revert_x = keep_y | (stuck & ~keep_x)
+        ys[revert_y] = old_y[revert_y]
+        xs[revert_x] = old_x[revert_x]
+
+    def waypoints(self, xs, ys, target_x, target_y, field):
+        # FlowField.waypoint for every (xs[i], ys[i]) at once
+        if field is None:
+            return target_x, target_y
+        arena = field.arena
+        col = xs // arena.cell_size
+        row = ys // arena.cell_size
+        inside = (col >= 0) & (col < arena.cols) & (row >= 0) & (row < arena.rows)
+        index = np.where(inside, row * arena.cols + col, 0).astype(np.int64)
+        step = np.where(inside, np.frombuffer(field.next_cell, dtype=np.int32)[index], -1)
+        heading = step >= 0
+        step = np.where(heading, step, 0)
+        goal_x = np.where(heading, np.frombuffer(field.centre_x, dtype=np.float64)[step], target_x)
+        goal_y = np.where(heading, np.frombuffer(field.centre_y, dtype=np.float64)[step], target_y)
+        return goal_x, goal_y
+
+    def flock_enemies(self, enemies, target_x, target_y, speed, steering, field=None):
+        if len(enemies) < self.min_batch:
+            return PythonKernel.flock_enemies(self, enemies, target_x, target_y, speed, steering, field)
+        xs = np.frombuffer(enemies.x, dtype=np.float64)
+        ys = np.frombuffer(enemies.y, dtype=np.float64)
+        boss = (np.frombuffer(enemies.flags, dtype=np.uint8) & FLAG_BOSS) != 0
+        count = len(xs)
+        radius = steering.radius
+        limit = radius * radius
+
+        goal_x, goal_y = self.waypoints(xs, ys, target_x, target_y, field)
+        dx = goal_x - xs
+        dy = goal_y - ys
+        distance = np.sqrt(dx * dx + dy * dy)
+        moving = distance > 0
+        safe_distance = np.where(moving, distance, 1.0)
+        chase_x = np.where(moving, dx / safe_distance, 0.0)
+        chase_y = np.where(moving, dy / safe_distance, 0.0)
+
+        # Neighbour pairs, in the order the Python kernel visits them: grid
+        # cells in its query order, store order within a cell. Enemies are
+        # sorted by cell, so each cell is one slice of `order`, found through
+        # per-cell start/count tables (cells are numbered densely, with a
+        # border of empty cells around the occupied ones).
+        cell_x = (xs // radius).astype(np.int64)
+        cell_y = (ys // radius).astype(np.int64)
+        span = int(cell_y.max() - cell_y.min()) + 3
+        keys = (cell_x - cell_x.min() + 1) * span + (cell_y - cell_y.min() + 1)
+        cells = (int(cell_x.max() - cell_x.min()) + 3) * span
+        if cells > 64 * count + 4096:
+            # Enemies too spread out for a table: fall back to the Python pass
+            return PythonKernel.flock_enemies(self, enemies, target_x, target_y, speed, steering, field)
+        order = np.argsort(keys, kind="stable")
+        cell_counts = np.bincount(keys, minlength=cells)
+        cell_starts = np.cumsum(cell_counts) - cell_counts
+        everyone = np.arange(count)
+        pair_i = []
+        pair_j = []
+        for offset_x in (-1, 0, 1):
+            for offset_y in (-1, 0, 1):
+                wanted = keys + (offset_x * span + offset_y)
+                lengths = cell_counts[wanted]
+                total = int(lengths.sum())
+                if not total:
+                    continue
+                firsts = np.cumsum(lengths) - lengths
+                within = np.arange(total) - np.repeat(firsts, lengths)
+                pair_i.append(np.repeat(everyone, lengths))
+                pair_j.append(order[np.repeat(cell_starts[wanted], lengths) + within])
+        pair_i = np.concatenate(pair_i)
+        pair_j = np.concatenate(pair_j)
+
+        ox = xs[pair_i] - xs[pair_j]
+        oy = ys[pair_i] - ys[pair_j]
+        d2 = ox * ox + oy * oy
+        keep = (d2 < limit) & (pair_i != pair_j) & ~boss[pair_i]
+        pair_i, pair_j, ox, oy, d2 = pair_i[keep], pair_j[keep], ox[keep], oy[keep], d2[keep]
+        stacked = d2 == 0
+        ox = np.where(stacked, np.where(pair_i > pair_j, 1.0, -1.0), ox)
+        oy = np.where(stacked, 0.0, oy)
+        d2 = np.where(stacked, 1.0, d2)
+
+        # bincount adds in pair order, so the sums match the Python loop
+        push_x = np.bincount(pair_i, weights=ox / d2, minlength=count)
+        push_y = np.bincount(pair_i, weights=oy / d2, minlength=count)
+        pull_x = np.bincount(pair_i, weights=-ox, minlength=count)
+        pull_y = np.bincount(pair_i, weights=-oy, minlength=count)
+        neighbours = np.bincount(pair_i, minlength=count)
+
+        separation_scale = steering.separation * radius
+        cohesion_scale = steering.cohesion / radius
+        step_x = chase_x * steering.chase + push_x * separation_scale
+        step_y = chase_y * steering.chase + push_y * separation_scale
+        crowded = neighbours > 0
+        safe_neighbours = np.maximum(neighbours, 1)
+        step_x = np.where(crowded, step_x + pull_x / safe_neighbours * cohesion_scale, step_x)
+        step_y = np.where(crowded, step_y + pull_y / safe_neighbours * cohesion_scale, step_y)
+        length = np.sqrt(step_x * step_x + step_y * step_y)
+        long_step = length > 1
+        safe_length = np.where(long_step, length, 1.0)
+        step_x = np.where(long_step, step_x / safe_length, step_x)
+        step_y = np.where(long_step, step_y / safe_length, step_y)
+        step_x = np.where(boss, chase_x, step_x)
+        step_y = np.where(boss, chase_y, step_y)
+
+        old_x = xs.copy()
+        old_y = ys.copy()
+        xs += step_x * speed
+        ys += step_y * speed
+        if field is not None:
+            self.settle_enemies(field.arena, xs, ys, old_x, old_y)
+
+    def contact_indices(self, enemies, target_x, target_y, radius, boss_radius):
+        if len(enemies) < self.min_batch:
+            return PythonKernel.contact_indices(self, enemies, target_x, target_y, radius, boss_radius)
+        xs = np.frombuffer(enemies.x, dtype=np.float64)
+        ys = np.frombuffer(enemies.y, dtype=np.float64)
+        flags = np.frombuffer(enemies.flags, dtype=np.uint8)
+        dx = target_x - xs
+        dy = target_y - ys
+        limit = np.where(flags & FLAG_BOSS, boss_radius, radius)
+        return np.flatnonzero(np.sqrt(dx * dx + dy * dy) < limit).tolist()
+
+    def advance_projectiles(self, projectiles, scale=1.0):
+        if len(projectiles) < self.min_batch:
+            return PythonKernel.advance_projectiles(self, projectiles, scale)
+        np.frombuffer(projectiles.x, dtype=np.float64)[:] += np.frombuffer(projectiles.dx, dtype=np.float64) * scale
+        np.frombuffer(projectiles.y, dtype=np.float64)[:] += np.frombuffer(projectiles.dy, dtype=np.float64) * scale
+
+    def hostile_hits(self, projectiles, target_x, target_y, radius):
+        if len(projectiles) < self.min_batch:
+            return PythonKernel.hostile_hits(self, projectiles, target_x, target_y, radius)
+        xs = np.frombuffer(projectiles.x, dtype=np.float64)
+        ys = np.frombuffer(projectiles.y, dtype=np.float64)
+        hostile = (np.frombuffer(projectiles.flags, dtype=np.uint8) & FLAG_HOSTILE) != 0
+        dx = xs - target_x
+        dy = ys - target_y
+        return np.flatnonzero(hostile & (np.sqrt(dx * dx + dy * dy) < radius)).tolist()
+
+    def wall_hits(self, store, arena, scale=1.0):
+        if len(store) < self.min_batch or not arena.obstacles:
+            return PythonKernel.wall_hits(self, store, arena, scale)
+        # Only entities that ended in a wall cell or crossed a cell border
+        # can have hit one. A move of at most one cell each way only visits
+        # the 2x2 block of cells around its ends, so it needs the cell walk
+        # only if one of those is a wall; the rest never leave the array code.
+        size = arena.cell_size
+        blocked = np.frombuffer(arena.blocked, dtype=np.uint8)
+
+        def walled(col, row):
+            inside = (col >= 0) & (col < arena.cols) & (row >= 0) & (row < arena.rows)
+            index = np.where(inside, row * arena.cols + col, 0).astype(np.int64)
+            return inside & (blocked[index] != 0)
+
+        xs = np.frombuffer(store.x, dtype=np.float64)
+        ys = np.frombuffer(store.y, dtype=np.float64)
+        start_x = xs - np.frombuffer(store.dx, dtype=np.float64) * scale
+        start_y = ys - np.frombuffer(store.dy, dtype=np.float64) * scale
+        col = xs // size
+        row = ys // size
+        start_col = start_x // size
+        start_row = start_y // size
+        end_walled = walled(col, row)
+        crossed = (col != start_col) | (row != start_row)
+        hits = dict.fromkeys(np.flatnonzero(end_walled & ~crossed).tolist(), 0.0)
+        short = (np.abs(col - start_col) <= 1) & (np.abs(row - start_row) <= 1)
+        near_wall = end_walled | walled(start_col, start_row) | walled(start_col, row) | walled(col, start_row)
+        segment_hit = arena.segment_hit
+        crossing = np.flatnonzero(crossed & (~short | near_wall))
+        segments = zip(
+            crossing.tolist(), start_x[crossing].tolist(), start_y[crossing].tolist(),
+            xs[crossing].tolist(), ys[crossing].tolist(),
+        )
+        for i, x0, y0, x1, y1 in segments:
+            t = segment_hit(x0, y0, x1, y1)
+            if t is not None:
+                hits[i] = t
+        return hits
+
+    def offscreen_indices(self, store, width, height):
+        if len(store) < self.min_batch:
+            return PythonKernel.offscreen_indices(self, store, width, height)
+        xs = np.frombuffer(store.x, dtype=np.float64)
+        ys = np.frombuffer(store.y, dtype=np.float64)
+        return np.flatnonzero((xs < 0) | (xs > width) | (ys < 0) | (ys > height)).tolist()
+
+
+# Kernels by name, for Simulation(kernel=...)
+KERNELS = {"python": PythonKernel, "numpy": NumpyKernel}
+
+
+def default_kernel(name=None):
+    # The named kernel, or NumPy when it is installed and the pure-Python
+    # loops otherwise
+    if name is not None:
+        if name == "numpy" and np is None:
+            raise RuntimeError("the numpy kernel needs NumPy")
+        return KERNELS[name]()
+    if np is not None:
+        return NumpyKernel()
+    return PythonKernel()
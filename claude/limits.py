@@ -0,0 +1,174 @@
+from collections import deque
+
+from entities import FLAG_HOSTILE
+
+# What to do with a new entity when its kind is at its cap
+CAP_DROP_OLDEST = "drop_oldest"  # remove the oldest entity of the kind to make room
+CAP_REFUSE = "refuse"  # don't spawn it
+CAP_MERGE = "merge"  # fold its health into the oldest enemy instead (enemies only)
+CAP_POLICIES = (CAP_DROP_OLDEST, CAP_REFUSE, CAP_MERGE)
+
+# Entity kinds -> (cap, policy). Bosses are never capped.
+DEFAULT_CAPS = {
+    "player_shot": (1500, CAP_DROP_OLDEST),
+    "boss_shot": (3000, CAP_DROP_OLDEST),
+    "enemy": (500, CAP_MERGE),
+}
+
+# Load levels, each shedding more than the one before:
+#   1: no random-direction bazooka bullets
+#   2: player shot cap halved
+#   3: every cap halved
+MAX_LOAD_LEVEL = 3
+SHED_CAP_SCALE = 0.5
+
+COUNTERS = ("capped", "dropped_oldest", "refused", "merged", "shed_bazooka", "load_raised", "load_lowered")
+
+
+class EntityLimits:
+    # Per-kind entity caps for a Simulation.
+    #
+    # Every capped spawn goes through admit(). Spawn order is kept per kind
+    # in a deque of handles so "oldest" is O(1) to find. Handles of entities
+    # that died in the meantime are skipped lazily, and the deque is
+    # compacted once it holds far more handles than the cap.
+    def __init__(self, caps=None):
+        self.caps = dict(DEFAULT_CAPS)
+        self.caps.update(caps or {})
+        for kind, (cap, policy) in self.caps.items():
+            if policy not in CAP_POLICIES:
+                raise ValueError(f"unknown cap policy for {kind}: {policy!r}")
+            if policy == CAP_MERGE and kind != "enemy":
+                raise ValueError(f"only enemies can merge, not {kind}")
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.spawn_order = {kind: deque() for kind in self.caps}
+
+    def cap(self, kind, load_level):
+        cap, _ = self.caps[kind]
+        if load_level >= 3 or (load_level >= 2 and kind == "player_shot"):
+            return max(1, int(cap * SHED_CAP_SCALE))
+        return cap
+
+    def rebuild(self, sim):
+        # Recreate spawn order from the stores (after a reset or restore).
+        # Handles only grow, so sorting by handle sorts by age.
+        for order in self.spawn_order.values():
+            order.clear()
+        shots = list(zip(sim.projectiles.handles, sim.projectiles.flags))
+        self.spawn_order["player_shot"].extend(sorted(handle for handle, flags in shots if not flags & FLAG_HOSTILE))
+        self.spawn_order["boss_shot"].extend(sorted(handle for handle, flags in shots if flags & FLAG_HOSTILE))
+        self.spawn_order["enemy"].extend(handle for handle in sorted(sim.enemies.handles) if handle != sim.current_boss)
+
+    def admit(self, sim, kind, count, hp=0.0):
+        # Make room for one new entity of `kind` (with `hp` health), given
+        # `count` live ones. Returns True to spawn it, False if it was
+        # refused or merged.
+        if count < self.cap(kind, sim.load_level):
+            return True
+        self.counters["capped"] += 1
+        _, policy = self.caps[kind]
+        if policy == CAP_REFUSE:
+            self.counters["refused"] += 1
+            return False
+
+        store = sim.enemies if kind == "enemy" else sim.projectiles
+        oldest = self.oldest(kind, store)
+        if oldest is None:
+            self.counters["refused"] += 1
+            return False
+        if policy == CAP_MERGE:
+            # The new enemy's health goes to the oldest one instead
+            store.hp[store.index_of[oldest]] += hp
+            self.counters["merged"] += 1
+            return False
+        store.remove(oldest)
+        self.spawn_order[kind].popleft()
+        self.counters["dropped_oldest"] += 1
+        return True
+
+    def admit_many(self, sim, kind, count, wanted):
+        # admit() for `wanted` new projectiles at once. Returns how many of
+        # them to spawn (dropping as many old ones as needed to fit them).
+        cap = self.cap(kind, sim.load_level)
+        room = max(0, cap - count)
+        if room >= wanted:
+            return wanted
+        over = wanted - room
+        self.counters["capped"] += over
+        _, policy = self.caps[kind]
+        if policy == CAP_MERGE:
+            raise ValueError(f"{kind} merges, admit it one at a time")
+        if policy == CAP_REFUSE:
+            self.counters["refused"] += over
+            return room
+        store = sim.enemies if kind == "enemy" else sim.projectiles
+        dropped = 0
+        while dropped < over:
+            oldest = self.oldest(kind, store)
+            if oldest is None:
+                break
+            store.remove(oldest)
+            self.spawn_order[kind].popleft()
+            dropped += 1
+        self.counters["dropped_oldest"] += dropped
+        self.counters["refused"] += over - dropped
+        return room + dropped
+
+    def oldest(self, kind, store):
+        order = self.spawn_order[kind]
+        while order:
+            handle = order[0]
+            if store.alive(handle):
+                return handle
+            order.popleft()
+        return None
+
+    def spawned(self, kind, handle, store):
+        self.spawned_many(kind, (handle,), store)
+
+    def spawned_many(self, kind, handles, store):
+        order = self.spawn_order[kind]
+        order.extend(handles)
+        if len(order) > 2 * self.caps[kind][0] + 64:
+            # Mostly handles of dead entities by now, keep the live ones
+            live = [handle for handle in order if store.alive(handle)]
+            order.clear()
+            order.extend(live)
+
+
+class LoadGovernor:
+    # Picks a Simulation load level from measured tick times.
+    #
+    # observe() takes the wall time of each tick. When the smoothed time stays
+    # over budget the level goes up one step; once it stays well under budget
+    # it comes back down. Levels shed cosmetic load first (see MAX_LOAD_LEVEL).
+    # The governor lives with the front end, which passes level changes to
+    # Simulation.set_load_level so they are recorded for replays.
+    def __init__(self, budget_ms=6.0, raise_after=30, lower_after=240, smoothing=0.1):
+        self.budget_ms = budget_ms
+        self.raise_after = raise_after  # ticks over budget before shedding more
+        self.lower_after = lower_after  # ticks under budget before shedding less
+        self.smoothing = smoothing
+        self.average_ms = 0.0
+        self.over = 0
+        self.under = 0
+        self.level = 0
+
+    def observe(self, tick_ms):
+        self.average_ms += (tick_ms - self.average_ms) * self.smoothing
+        if self.average_ms > self.budget_ms:
+            self.over += 1
+            self.under = 0
+            if self.over >= self.raise_after and self.level < MAX_LOAD_LEVEL:
+                self.level += 1
+                self.over = 0
+        elif self.average_ms < self.budget_ms * 0.6:
+            self.under += 1
+            self.over = 0
+            if self.under >= self.lower_after and self.level > 0:
+                self.level -= 1
+                self.under = 0
+        else:
+            self.over = 0
+            self.under = 0
+        return self.level
@@ -0,0 +1,166 @@
+import math
+import random
+import time
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, the update falls back to a Python loop
+    np = None
+
+from patterns import ANGLE_STEPS, COS_TABLE, SIN_TABLE, angle_step, degrees_step
+
+# Effect kind (as recorded in Simulation.effects) -> (particles, speed in
+# pixels per tick, life in ticks, colors). Effects with a direction spray
+# within DIRECTED_SPREAD degrees of it, the rest all around.
+EFFECTS = {
+    "hit": (6, 3.0, 10, ("yellow", "white")),
+    "death": (16, 4.0, 22, ("red", "orange", "yellow")),
+    "boss_death": (96, 6.0, 45, ("red", "orange", "yellow", "white")),
+    "muzzle": (4, 3.0, 5, ("white", "yellow")),
+    "wall": (5, 2.0, 8, ("gray80", "white")),
+}
+DIRECTED_SPREAD = 50
+
+# Every particle color, indexed by the color column
+PARTICLE_COLORS = tuple(sorted({color for *_, colors in EFFECTS.values() for color in colors}))
+EFFECT_COLORS = {kind: [PARTICLE_COLORS.index(color) for color in colors] for kind, (*_, colors) in EFFECTS.items()}
+
+# Particles keep this fraction of their speed each tick
+DRAG = 0.9
+
+# Drawn size (pixels) of a particle
+PARTICLE_SIZE = 4
+
+# Random numbers drawn up front and read in turn by emit()
+NOISE_SIZE = 4096
+
+
+class ParticleSystem:
+    # Short-lived cosmetic particles (hit sparks, death bursts, muzzle
+    # flashes) in a fixed-size ring buffer.
+    #
+    # Every column is allocated once at `capacity` slots and never grows.
+    # emit() writes new particles at the ring's head, overwriting the oldest
+    # slots once the buffer wraps, so `capacity` is a hard cap and a burst
+    # never allocates. update() advances the live slots in one batched pass (on
+    # zero-copy NumPy views when NumPy is installed); a slot is live while
+    # its life (in ticks) is above 0. The random spread of a burst comes from
+    # a table of NOISE_SIZE numbers drawn from the system's own rng (never
+    # the simulation's, so effects can't change how a game plays out).
+    #
+    # Renderers drain Simulation.effects into emit_effects() and draw the
+    # live slots in one batch. update_ms is the cost of the last update().
+    def __init__(self, capacity=2048, seed=None):
+        self.capacity = capacity
+        zeros = bytes(8 * capacity)
+        self.x = array("d", zeros)
+        self.y = array("d", zeros)
+        self.dx = array("d", zeros)
+        self.dy = array("d", zeros)
+        self.life = array("d", zeros)
+        self.color = array("B", bytes(capacity))
+        self.head = 0  # next slot to write
+        rng = random.Random(seed)
+        self.noise = array("d", (rng.random() for _ in range(NOISE_SIZE)))
+        self.noise_head = 0
+        self.live = 0
+        self.emitted = 0
+        self.overwritten = 0  # still-live particles replaced by new ones
+        self.update_ms = 0.0
+        if np is not None:
+            self.arrays = {
+                name: np.frombuffer(getattr(self, name), dtype=np.float64)
+                for name in ("x", "y", "dx", "dy", "life")
+            }
+            self.scratch = np.empty(capacity)
+            self.alive = np.empty(capacity, dtype=bool)
+
+    def clear(self):
+        for slot in range(self.capacity):
+            self.life[slot] = 0.0
+        self.live = 0
+
+    def emit(self, kind, x, y, dx=0.0, dy=0.0):
+        # One effect's worth of particles at (x, y), sprayed along (dx, dy)
+        # if it is non-zero
+        count, speed, life, _ = EFFECTS[kind]
+        colors = EFFECT_COLORS[kind]
+        color_count = len(colors)
+        noise = self.noise
+        n = self.noise_head
+        if dx or dy:
+            first = angle_step(math.atan2(dy, dx)) - degrees_step(DIRECTED_SPREAD / 2)
+            spread = degrees_step(DIRECTED_SPREAD)
+        else:
+            first = 0
+            spread = ANGLE_STEPS
+        capacity = self.capacity
+        xs, ys, dxs, dys, lives, color = self.x, self.y, self.dx, self.dy, self.life, self.color
+        slot = self.head
+        for _ in range(count):
+            if lives[slot] > 0:
+                self.overwritten += 1
+            step = (first + int(noise[n] * spread)) % ANGLE_STEPS
+            particle_speed = speed * (0.4 + 0.6 * noise[n + 1])
+            xs[slot] = x
+            ys[slot] = y
+            dxs[slot] = COS_TABLE[step] * particle_speed
+            dys[slot] = SIN_TABLE[step] * particle_speed
+            lives[slot] = life * (0.6 + 0.4 * noise[n + 2])
+            color[slot] = colors[int(noise[n + 3] * color_count)]
+            n = (n + 4) % NOISE_SIZE
+            slot += 1
+            if slot == capacity:
+                slot = 0
+        self.noise_head = n
+        self.head = slot
+        self.emitted += count
+        self.live = min(capacity, self.live + count)
+
+    def emit_effects(self, effects):
+        # Emit and empty a list of (kind, x, y, dx, dy) effects
+        for kind, x, y, dx, dy in effects:
+            self.emit(kind, x, y, dx, dy)
+        del effects[:]
+
+    def update(self, scale=1.0):
+        # Advance every particle by `scale` ticks
+        start = time.perf_counter()
+        drag = DRAG ** scale
+        if np is not None:
+            # Only live slots change, as in the loop below
+            x, y, dx, dy, life = (self.arrays[name] for name in ("x", "y", "dx", "dy", "life"))
+            scratch = self.scratch
+            alive = self.alive
+            np.greater(life, 0, out=alive)
+            np.multiply(dx, scale, out=scratch, where=alive)
+            np.add(x, scratch, out=x, where=alive)
+            np.multiply(dy, scale, out=scratch, where=alive)
+            np.add(y, scratch, out=y, where=alive)
+            np.multiply(dx, drag, out=dx, where=alive)
+            np.multiply(dy, drag, out=dy, where=alive)
+            np.subtract(life, scale, out=life, where=alive)
+            np.greater(life, 0, out=alive)
+            self.live = int(np.count_nonzero(alive))
+        else:
+            xs, ys, dxs, dys, life = self.x, self.y, self.dx, self.dy, self.life
+            live = 0
+            for slot in range(self.capacity):
+                if life[slot] > 0:
+                    xs[slot] += dxs[slot] * scale
+                    ys[slot] += dys[slot] * scale
+                    dxs[slot] *= drag
+                    dys[slot] *= drag
+                    life[slot] -= scale
+                    if life[slot] > 0:
+                        live += 1
+            self.live = live
+        self.update_ms = (time.perf_counter() - start) * 1000
+
+    def live_slots(self):
+        # Indices of the live particles
+        if np is not None:
+            return np.flatnonzero(self.arrays["life"] > 0)
+        life = self.life
+        return [slot for slot in range(self.capacity) if life[slot] > 0]
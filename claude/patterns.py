@@ -0,0 +1,125 @@
+import math
+from array import array
+
+# Directions are whole steps of a full turn, looked up in these tables
+# instead of calling cos/sin per bullet. 720 steps is half a degree.
+ANGLE_STEPS = 720
+COS_TABLE = array("d", (math.cos(2 * math.pi * step / ANGLE_STEPS) for step in range(ANGLE_STEPS)))
+SIN_TABLE = array("d", (math.sin(2 * math.pi * step / ANGLE_STEPS) for step in range(ANGLE_STEPS)))
+
+
+# speed -> (cos, sin) tables already multiplied by that speed
+SCALED_TABLES = {}
+
+
+def scaled_tables(speed):
+    tables = SCALED_TABLES.get(speed)
+    if tables is None:
+        tables = SCALED_TABLES[speed] = (
+            array("d", (value * speed for value in COS_TABLE)),
+            array("d", (value * speed for value in SIN_TABLE)),
+        )
+    return tables
+
+
+def angle_step(radians):
+    # Nearest table step for an angle (any sign, any number of turns)
+    return round(radians * ANGLE_STEPS / (2 * math.pi)) % ANGLE_STEPS
+
+
+def degrees_step(degrees):
+    return round(degrees * ANGLE_STEPS / 360) % ANGLE_STEPS
+
+
+# Bullet patterns. Each one is a plain description of one burst; steps()
+# turns it into the table steps of that burst's bullet directions, given
+# the burst number (for patterns that turn or sway over time) and the step
+# pointing at the player. Angles are in degrees, clockwise on screen.
+
+
+class Ring:
+    # `count` bullets evenly around the boss, the ring turning by `spin`
+    # degrees every burst
+    def __init__(self, count, speed, spin=0.0):
+        self.count = count
+        self.speed = speed
+        self.spin = spin
+        self.offsets = [k * ANGLE_STEPS // count for k in range(count)]
+
+    def steps(self, burst, aim):
+        start = degrees_step(self.spin * burst)
+        return [(start + offset) % ANGLE_STEPS for offset in self.offsets]
+
+
+class Spiral(Ring):
+    # A few `arms` fired often, turning `turn` degrees per burst, so the
+    # bullets trace spiral arms
+    def __init__(self, arms, speed, turn):
+        Ring.__init__(self, arms, speed, spin=turn)
+
+
+class Fan:
+    # `count` bullets spread over `spread` degrees, centred on the player
+    def __init__(self, count, speed, spread):
+        self.count = count
+        self.speed = speed
+        self.spread = spread
+        gap = spread / (count - 1) if count > 1 else 0.0
+        self.offsets = [degrees_step(k * gap - spread / 2) for k in range(count)]
+
+    def steps(self, burst, aim):
+        return [(aim + offset) % ANGLE_STEPS for offset in self.offsets]
+
+
+class Wave(Fan):
+    # A fan that sways `sweep` degrees either side of the player, one full
+    # sway every `period` bursts
+    def __init__(self, count, speed, spread, sweep, period=32):
+        Fan.__init__(self, count, speed, spread)
+        self.sweep = sweep
+        self.period = period
+
+    def steps(self, burst, aim):
+        sway = SIN_TABLE[burst * ANGLE_STEPS // self.period % ANGLE_STEPS] * self.sweep
+        return Fan.steps(self, burst, (aim + degrees_step(sway)) % ANGLE_STEPS)
+
+
+class Volley:
+    # `bursts` bursts of a pattern, one every `interval` ms
+    def __init__(self, pattern, interval, bursts):
+        self.pattern = pattern
+        self.interval = interval
+        self.bursts = bursts
+
+
+def burst_velocities(pattern, burst, aim):
+    # (dxs, dys) of one burst, looked up in the tables for its speed
+    dx_table, dy_table = scaled_tables(pattern.speed)
+    steps = pattern.steps(burst, aim)
+    return [dx_table[step] for step in steps], [dy_table[step] for step in steps]
+
+
+# Barrages for bosses of level 3 and up, played in a loop while the boss
+# lives. Levels above the last entry use the last (densest) one.
+BOSS_BARRAGES = {
+    3: (
+        Volley(Spiral(arms=4, speed=5, turn=11), interval=50, bursts=60),
+        Volley(Ring(count=36, speed=4, spin=5), interval=250, bursts=12),
+        Volley(Fan(count=7, speed=6, spread=60), interval=150, bursts=20),
+        Volley(Wave(count=5, speed=5, spread=16, sweep=45), interval=80, bursts=40),
+    ),
+    4: (
+        Volley(Spiral(arms=6, speed=5, turn=9), interval=32, bursts=120),
+        Volley(Ring(count=48, speed=4, spin=3.75), interval=150, bursts=24),
+        Volley(Wave(count=9, speed=6, spread=40, sweep=60, period=24), interval=48, bursts=80),
+        Volley(Fan(count=13, speed=5, spread=120), interval=100, bursts=30),
+    ),
+}
+FIRST_BARRAGE_LEVEL = min(BOSS_BARRAGES)
+
+
+def barrage_for_level(level):
+    # The barrage a boss of this level plays (None below FIRST_BARRAGE_LEVEL)
+    if level < FIRST_BARRAGE_LEVEL:
+        return None
+    return BOSS_BARRAGES[min(level, max(BOSS_BARRAGES))]
@@ -0,0 +1,223 @@
+import time
+import tkinter as tk
+
+try:
+    import numpy as np
+except ImportError:  # Only this backend needs NumPy
+    np = None
+
+from entities import FLAG_BOSS, FLAG_HOSTILE
+from particles import PARTICLE_COLORS, PARTICLE_SIZE, ParticleSystem
+from renderer import BULLET_COLORS, CanvasRenderer
+
+BACKGROUND = "lightblue"
+
+# Framebuffer margin in screen pixels, at least half the largest sprite (the
+# boss)
+SPRITE_MARGIN = 48
+
+
+class PhotoRenderer(CanvasRenderer):
+    # Draws a Simulation by rasterising each frame into one PhotoImage.
+    #
+    # Instead of one canvas item per entity, the whole world is painted into
+    # a NumPy framebuffer and handed to Tk as a single PPM image, so the Tk
+    # side costs the same however many entities there are. Sprites are
+    # single-color layers (outline ring and fill), each a list of pixel
+    # offsets that is stamped for every entity of a kind with one
+    # fancy-indexed assignment. Pixels are 32-bit (RGB plus a pad byte) so a
+    # pixel is written as one value, and the framebuffer has a margin
+    # wider than any sprite so stamping never needs per-pixel clipping.
+    #
+    # pixel_scale > 1 renders at a fraction of the screen resolution and
+    # lets Tk zoom the frame up, trading sharpness for speed. HUD, shop and
+    # telegraph items stay ordinary canvas items above the image.
+    #
+    # Particles are painted into the same frame with one fancy-indexed
+    # write for all live slots, so this backend affords a larger cap.
+    def __init__(self, canvas, sim, pixel_scale=2, particle_cap=4096):
+        if np is None:
+            raise RuntimeError("the photo renderer needs NumPy")
+        self.canvas = canvas
+        self.sim = sim
+        self.pixel_scale = pixel_scale
+        self.width = sim.screen_width // pixel_scale
+        self.height = sim.screen_height // pixel_scale
+        self.margin = -(-SPRITE_MARGIN // pixel_scale)
+        self.stride = self.width + 2 * self.margin
+        self.buffer = np.empty((self.height + 2 * self.margin, self.stride), dtype=np.uint32)
+        self.pixels = self.buffer.reshape(-1)
+        # The visible part as (height, width, RGB) bytes
+        self.frame = self.buffer[self.margin:-self.margin, self.margin:-self.margin].view(np.uint8)
+        self.frame = self.frame.reshape(self.height, self.width, 4)[:, :, :3]
+        self.ppm_header = b"P6 %d %d 255\n" % (self.width, self.height)
+        self.background = self.pixel(BACKGROUND)
+        self.telegraphs = {}
+        self.image = None
+        self.touched = 0
+        self.skipped = 0
+        self.culled = 0
+        self.particles = ParticleSystem(particle_cap)
+        self.particle_ms = 0.0
+        sim.effects = []
+        self.rebuild()
+
+    def pixel(self, color):
+        # Tk color name -> framebuffer pixel, as Tk itself would draw it
+        red, green, blue = (value >> 8 for value in self.canvas.winfo_rgb(color))
+        return np.array([red, green, blue, 0], dtype=np.uint8).view(np.uint32)[0]
+
+    def rect_sprite(self, half, outline_width, fill, outline):
+        # Square of side 2 * half (screen pixels) with an outline
+        return self.sprite(half, outline_width, fill, outline, round_shape=False)
+
+    def oval_sprite(self, radius, outline_width, fill, outline):
+        return self.sprite(radius, outline_width, fill, outline, round_shape=True)
+
+    def sprite(self, half, outline_width, fill, outline, round_shape):
+        # (half size, [(flat pixel offsets, pixel)]) in framebuffer pixels
+        # Layers don't overlap, so every pixel is written once
+        half = max(1, half // self.pixel_scale)
+        inner = max(0, half - max(1, outline_width // self.pixel_scale))
+        dy, dx = np.mgrid[-half:half, -half:half]
+        if round_shape:
+            distance = np.sqrt((dx + 0.5) ** 2 + (dy + 0.5) ** 2)
+        else:
+            distance = np.maximum(np.abs(dx + 0.5), np.abs(dy + 0.5))
+        offsets = dy * self.stride + dx
+        layers = []
+        for keep, color in ((distance > inner) & (distance <= half), outline), (distance <= inner, fill):
+            if keep.any():
+                layers.append((offsets[keep], self.pixel(color)))
+        return half, layers
+
+    def rebuild(self):
+        # Create the image item (the canvas was just cleared) and the sprites
+        sim = self.sim
+        sim.enemies.forget_views()
+        sim.projectiles.forget_views()
+        self.telegraphs = {}
+
+        self.player_sprite = self.rect_sprite(25, 2, "blue", "darkblue")
+        self.enemy_sprite = self.rect_sprite(20, 2, "red", "darkred")
+        self.boss_sprite = self.rect_sprite(40, 4, "darkred", "red")
+        self.boss_shot_sprite = self.oval_sprite(8, 2, "orange", "red")
+        self.player_shot_sprites = [self.oval_sprite(8, 2, fill, outline) for fill, outline in BULLET_COLORS]
+        self.backdrop = self.paint_backdrop()
+
+        # Particles: a small square of offsets and a pixel per color
+        size = max(1, PARTICLE_SIZE // self.pixel_scale)
+        dy, dx = np.mgrid[0:size, 0:size] - size // 2
+        self.particle_offsets = (dy * self.stride + dx).ravel()
+        self.particle_pixels = np.array([self.pixel(color) for color in PARTICLE_COLORS], dtype=np.uint32)
+        self.reset_particles()
+
+        # The frame is decoded into `source`; with pixel_scale > 1 Tk zooms
+        # it into the displayed image
+        self.source = tk.PhotoImage(master=self.canvas, width=self.width, height=self.height)
+        if self.pixel_scale > 1:
+            self.display = tk.PhotoImage(master=self.canvas, width=sim.screen_width, height=sim.screen_height)
+        else:
+            self.display = self.source
+        self.image = self.canvas.create_image(0, 0, image=self.display, anchor="nw")
+        self.canvas.tag_lower(self.image)
+
+    def paint_backdrop(self):
+        # Background with the walls on it, copied into each frame
+        backdrop = np.empty_like(self.buffer)
+        backdrop[:] = self.background
+        scale = self.pixel_scale
+        margin = self.margin
+        edge = max(1, 2 // scale)
+        wall = self.pixel("gray40")
+        wall_outline = self.pixel("gray25")
+        for x0, y0, x1, y1 in self.sim.arena.obstacles:
+            x0 = min(max(x0 // scale, 0), self.width) + margin
+            x1 = min(max(x1 // scale, 0), self.width) + margin
+            y0 = min(max(y0 // scale, 0), self.height) + margin
+            y1 = min(max(y1 // scale, 0), self.height) + margin
+            backdrop[y0:y1, x0:x1] = wall_outline
+            backdrop[y0 + edge:y1 - edge, x0 + edge:x1 - edge] = wall
+        return backdrop
+
+    def stamp(self, sprite, xs, ys):
+        # Paint a sprite centred on every (xs[i], ys[i]). Entities too far
+        # off screen to show are skipped, the rest fit inside the margin.
+        half, layers = sprite
+        if len(xs) == 0:
+            return
+        cx = (xs // self.pixel_scale).astype(np.int64)
+        cy = (ys // self.pixel_scale).astype(np.int64)
+        reach = self.margin - half
+        shown = (cx >= -reach) & (cx < self.width + reach) & (cy >= -reach) & (cy < self.height + reach)
+        centres = (cy[shown] + self.margin) * self.stride + (cx[shown] + self.margin)
+        for offsets, color in layers:
+            self.pixels[(centres[:, None] + offsets).ravel()] = color
+
+    def rasterise(self):
+        # Paint the current simulation state into self.frame
+        sim = self.sim
+        self.buffer[:] = self.backdrop
+
+        enemies = sim.enemies
+        if len(enemies):
+            xs = np.frombuffer(enemies.x, dtype=np.float64)
+            ys = np.frombuffer(enemies.y, dtype=np.float64)
+            boss = (np.frombuffer(enemies.flags, dtype=np.uint8) & FLAG_BOSS) != 0
+            self.stamp(self.enemy_sprite, xs[~boss], ys[~boss])
+            self.stamp(self.boss_sprite, xs[boss], ys[boss])
+
+        projectiles = sim.projectiles
+        if len(projectiles):
+            xs = np.frombuffer(projectiles.x, dtype=np.float64)
+            ys = np.frombuffer(projectiles.y, dtype=np.float64)
+            hostile = (np.frombuffer(projectiles.flags, dtype=np.uint8) & FLAG_HOSTILE) != 0
+            self.stamp(self.boss_shot_sprite, xs[hostile], ys[hostile])
+            player_shot = self.player_shot_sprites[min(sim.bullet_color_level, 4)]
+            self.stamp(player_shot, xs[~hostile], ys[~hostile])
+
+        self.stamp(self.player_sprite, np.array([float(sim.player_x)]), np.array([float(sim.player_y)]))
+        self.paint_particles()
+
+    def paint_particles(self):
+        start = time.perf_counter()
+        self.advance_particles()
+        particles = self.particles
+        slots = particles.live_slots()
+        if len(slots):
+            arrays = particles.arrays
+            cx = (arrays["x"][slots] // self.pixel_scale).astype(np.int64)
+            cy = (arrays["y"][slots] // self.pixel_scale).astype(np.int64)
+            shown = (cx >= 0) & (cx < self.width) & (cy >= 0) & (cy < self.height)
+            centres = (cy[shown] + self.margin) * self.stride + (cx[shown] + self.margin)
+            colors = self.particle_pixels[np.frombuffer(particles.color, dtype=np.uint8)[slots[shown]]]
+            offsets = self.particle_offsets
+            self.pixels[(centres[:, None] + offsets).ravel()] = np.repeat(colors, len(offsets))
+        self.particle_ms = (time.perf_counter() - start) * 1000
+
+    def present(self):
+        # Hand the frame to Tk (one PPM decode, plus a zoom when scaled)
+        tk_app = self.canvas.tk
+        tk_app.call(self.source.name, "put", self.ppm_header + self.frame.tobytes(), "-format", "ppm")
+        if self.display is not self.source:
+            scale = self.pixel_scale
+            tk_app.call(self.display.name, "copy", self.source.name, "-zoom", scale, scale)
+
+    def draw(self):
+        # Nothing holds canvas items per entity, so just drop the released ids
+        del self.sim.enemies.released[:]
+        del self.sim.projectiles.released[:]
+        self.rasterise()
+        self.present()
+        self.draw_telegraphs()
+        self.touched = 1  # the image
+
+    def restyle_player_shots(self):
+        # Shot colors are picked every frame
+        pass
+
+    def items(self):
+        return [self.image] + list(self.telegraphs.values())
+
+    def pool_stats(self):
+        return {}
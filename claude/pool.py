@@ -0,0 +1,75 @@
+class ItemPool:
+    # Reusable canvas items of one kind ("oval" or "rectangle").
+    #
+    # Creating and deleting Tk canvas items is expensive, so instead of
+    # deleting an item the pool hides it and hands it out again later.
+    # reset() fills the pool with `prealloc` hidden items and it grows on
+    # demand.
+    #
+    # `cap` limits what the pool keeps, not what it hands out: acquire()
+    # always returns an item, creating one when none is free, so the items
+    # in use are bounded only by the entity caps (limits.py). release()
+    # hides an item for reuse only while fewer than `cap` items (in use plus
+    # hidden) exist; past that it deletes it, so after a spike the hidden
+    # spares shrink back. A cap below the most items ever in use at once
+    # means create/delete churn at that peak: CanvasRenderer sizes it from
+    # the entity caps.
+    def __init__(self, canvas, kind, prealloc=0, cap=4096):
+        self.canvas = canvas
+        self.kind = kind
+        self.prealloc = prealloc
+        self.cap = cap
+
+        # Stats
+        self.hits = 0  # acquire() served by a hidden item
+        self.misses = 0  # acquire() had to create a new item
+        self.high_water = 0  # most items in use at once
+
+        # Empty until the owner's first reset(), so no items are made twice
+        self.free = []
+        self.in_use = 0
+
+    def reset(self):
+        # Forget every item (the canvas was cleared) and pre-create new ones
+        self.free = []
+        self.in_use = 0
+        for _ in range(min(self.prealloc, self.cap)):
+            self.free.append(self._create((0, 0, 0, 0), state="hidden"))
+
+    def _create(self, coords, **options):
+        if self.kind == "oval":
+            return self.canvas.create_oval(*coords, **options)
+        return self.canvas.create_rectangle(*coords, **options)
+
+    def acquire(self, coords, **options):
+        # Return a visible item at coords with the given fill/outline/width
+        if self.free:
+            item = self.free.pop()
+            self.hits += 1
+            self.canvas.coords(item, *coords)
+            self.canvas.itemconfig(item, state="normal", **options)
+        else:
+            item = self._create(coords, **options)
+            self.misses += 1
+        self.in_use += 1
+        if self.in_use > self.high_water:
+            self.high_water = self.in_use
+        return item
+
+    def release(self, item):
+        # Hide the item for reuse, or delete it if `cap` items exist
+        self.in_use -= 1
+        if len(self.free) + self.in_use < self.cap:
+            self.canvas.itemconfig(item, state="hidden")
+            self.free.append(item)
+        else:
+            self.canvas.delete(item)
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "high_water": self.high_water,
+            "in_use": self.in_use,
+            "free": len(self.free),
+        }
@@ -0,0 +1,120 @@
+import csv
+import time
+from collections import deque
+
+# Frame phases, in the order they run
+PHASES = ("input", "spawn", "enemy_move", "boss", "projectiles", "collision", "removal", "render")
+
+
+class PhaseProfiler:
+    # Per-phase frame timer.
+    #
+    # The game loop calls start() when a tick (or the render) begins and
+    # mark(phase) after each phase; the time since the previous call is added
+    # to that phase. end_frame() closes the frame. While disabled, start and
+    # mark are bound to a no-op, so the instrumented code only pays for an
+    # empty method call.
+    def __init__(self, window=120, trace_frames=100000):
+        self.frames = deque(maxlen=window)  # phase times of recent frames, for rolling averages
+        self.trace = deque(maxlen=trace_frames)  # rows for the CSV export
+        self.frame_index = 0
+        self.last = 0.0
+        self.totals = dict.fromkeys(PHASES, 0.0)
+        self.enable(False)
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+        if enabled:
+            self.start = self._start
+            self.mark = self._mark
+        else:
+            self.start = self._skip
+            self.mark = self._skip
+
+    def _skip(self, *args):
+        pass
+
+    def _start(self):
+        self.last = time.perf_counter()
+
+    def _mark(self, phase):
+        now = time.perf_counter()
+        self.totals[phase] += (now - self.last) * 1000
+        self.last = now
+
+    def end_frame(self, enemies, projectiles):
+        # Store this frame's phase times (ms) and entity counts
+        if not self.enabled:
+            return
+        frame = tuple(self.totals[phase] for phase in PHASES)
+        self.frames.append(frame)
+        self.trace.append((self.frame_index,) + frame + (enemies, projectiles))
+        self.frame_index += 1
+        for phase in PHASES:
+            self.totals[phase] = 0.0
+
+    def averages(self):
+        # Rolling mean of each phase (ms) over the recent frames
+        if not self.frames:
+            return dict.fromkeys(PHASES, 0.0)
+        count = len(self.frames)
+        return {phase: sum(column) / count for phase, column in zip(PHASES, zip(*self.frames))}
+
+    def write_csv(self, path):
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(("frame",) + tuple(f"{phase}_ms" for phase in PHASES) + ("enemies", "projectiles"))
+            writer.writerows(self.trace)
+        return len(self.trace)
+
+
+class ProfilerOverlay:
+    # On-canvas text showing the profiler's rolling per-phase milliseconds.
+    # The text is refreshed every `refresh_frames` frames, since changing it
+    # makes Tk lay it out again.
+    def __init__(self, canvas, profiler, x=20, y=140, refresh_frames=15):
+        self.canvas = canvas
+        self.profiler = profiler
+        self.x = x
+        self.y = y
+        self.refresh_frames = refresh_frames
+        self.item = None
+
+    def forget(self):
+        # The canvas was cleared
+        self.item = None
+
+    def hide(self):
+        if self.item is not None:
+            self.canvas.delete(self.item)
+            self.item = None
+
+    def items(self):
+        return [] if self.item is None else [self.item]
+
+    def update(self, enemies, projectiles, ticks_per_frame, sim=None, renderer=None):
+        if self.item is not None and self.profiler.frame_index % self.refresh_frames:
+            return
+        averages = self.profiler.averages()
+        lines = [f"{phase:<11}{ms:7.3f} ms" for phase, ms in averages.items()]
+        lines.append(f"{'total':<11}{sum(averages.values()):7.3f} ms")
+        lines.append(f"enemies {enemies}  shots {projectiles}")
+        lines.append(f"ticks/frame {ticks_per_frame:.2f}")
+        if sim is not None:
+            counters = sim.limits.counters
+            lines.append(f"load {sim.load_level}  capped {counters['capped']}  shed {counters['shed_bazooka']}")
+        if renderer is not None:
+            lines.append(f"touched {renderer.touched}  skipped {renderer.skipped}  culled {renderer.culled}")
+            particles = renderer.particles
+            lines.append(f"particles {particles.live}/{particles.capacity}  {particles.update_ms + renderer.particle_ms:.3f} ms")
+        text = "\n".join(lines)
+        if self.item is None:
+            self.item = self.canvas.create_text(
+                self.x, self.y,
+                text=text,
+                font=("Courier", 14, "bold"),
+                fill="black",
+                anchor="nw"
+            )
+        else:
+            self.canvas.itemconfig(self.item, text=text)
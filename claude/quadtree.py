@@ -0,0 +1,107 @@
+import heapq
+import math
+
+
+class Quadtree:
+    # Point quadtree for nearest-neighbour and radius queries.
+    #
+    # Like SpatialGrid it is rebuilt from scratch when the points move, here
+    # in one O(n log n) bulk build. A node is a tuple (x0, y0, x1, y1,
+    # children, points): inner nodes have up to four non-empty children,
+    # leaves hold at most `capacity` (x, y, index) points (more only once
+    # `max_depth` is reached, e.g. for stacked points). nearest() visits
+    # nodes best-first by their distance to the query, so it only opens the
+    # O(log n) nodes around the answer instead of scanning every point.
+    def __init__(self, capacity=8, max_depth=12):
+        self.capacity = capacity
+        self.max_depth = max_depth
+        self.root = None
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def clear(self):
+        self.root = None
+        self.size = 0
+
+    def rebuild(self, points):
+        # points: iterable of (index, x, y)
+        points = [(x, y, index) for index, x, y in points]
+        self.size = len(points)
+        if not points:
+            self.root = None
+            return
+        xs = [point[0] for point in points]
+        ys = [point[1] for point in points]
+        self.root = self._build(points, min(xs), min(ys), max(xs), max(ys), 0)
+
+    def _build(self, points, x0, y0, x1, y1, depth):
+        if len(points) <= self.capacity or depth >= self.max_depth:
+            return (x0, y0, x1, y1, None, points)
+        mx = (x0 + x1) * 0.5
+        my = (y0 + y1) * 0.5
+        quadrants = ([], [], [], [])
+        for point in points:
+            quadrants[(point[0] >= mx) + 2 * (point[1] >= my)].append(point)
+        bounds = ((x0, y0, mx, my), (mx, y0, x1, my), (x0, my, mx, y1), (mx, my, x1, y1))
+        children = tuple(
+            self._build(quadrant, *box, depth + 1)
+            for quadrant, box in zip(quadrants, bounds) if quadrant
+        )
+        return (x0, y0, x1, y1, children, None)
+
+    def nearest(self, x, y, k=1, max_distance=math.inf):
+        # Indices of the k points closest to (x, y) and no further than
+        # max_distance, nearest first (ties by index)
+        if self.root is None or k <= 0:
+            return []
+        limit = max_distance * max_distance
+        best = []  # max-heap of (-distance², -index)
+        nodes = [(0.0, 0, self.root)]  # (distance² to the node's box, tie, node)
+        tie = 1
+        while nodes:
+            node_distance, _, node = heapq.heappop(nodes)
+            if node_distance > limit:
+                break
+            x0, y0, x1, y1, children, points = node
+            if children is None:
+                for px, py, index in points:
+                    distance = (px - x) ** 2 + (py - y) ** 2
+                    if distance <= limit:
+                        heapq.heappush(best, (-distance, -index))
+                        if len(best) > k:
+                            heapq.heappop(best)
+                        if len(best) == k:
+                            limit = -best[0][0]
+                continue
+            for child in children:
+                cx0, cy0, cx1, cy1 = child[:4]
+                dx = cx0 - x if x < cx0 else (x - cx1 if x > cx1 else 0.0)
+                dy = cy0 - y if y < cy0 else (y - cy1 if y > cy1 else 0.0)
+                child_distance = dx * dx + dy * dy
+                if child_distance <= limit:
+                    heapq.heappush(nodes, (child_distance, tie, child))
+                    tie += 1
+        return [-index for _, index in sorted(best, reverse=True)]
+
+    def within(self, x, y, radius):
+        # Indices of every point within radius of (x, y), in no set order
+        found = []
+        if self.root is None:
+            return found
+        limit = radius * radius
+        stack = [self.root]
+        while stack:
+            x0, y0, x1, y1, children, points = stack.pop()
+            dx = x0 - x if x < x0 else (x - x1 if x > x1 else 0.0)
+            dy = y0 - y if y < y0 else (y - y1 if y > y1 else 0.0)
+            if dx * dx + dy * dy > limit:
+                continue
+            if children is None:
+                for px, py, index in points:
+                    if (px - x) ** 2 + (py - y) ** 2 <= limit:
+                        found.append(index)
+            else:
+                stack.extend(children)
+        return found
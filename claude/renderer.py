@@ -0,0 +1,358 @@
+import time
+from array import array
+
+from entities import FLAG_BOSS, FLAG_HOSTILE
+from particles import PARTICLE_COLORS, PARTICLE_SIZE, ParticleSystem
+from pool import ItemPool
+from simulation import TICK_MS
+
+# Player bullet (fill, outline) colors by bullet_color_level
+BULLET_COLORS = [
+    ("yellow", "orange"),
+    ("darkblue", "blue"),
+    ("purple", "darkviolet"),
+    ("turquoise", "cyan"),
+    ("black", "gray")
+]
+
+# Canvas tags of projectile items, so all shots of one side can be restyled
+# with a single call
+PLAYER_SHOT_TAG = "player_shot"
+BOSS_SHOT_TAG = "boss_shot"
+
+# Tcl proc that applies a frame's queued moves: one flat list of
+# item, x0, y0, x1, y1 groups. Looping inside Tcl keeps it to one crossing,
+# and passing numbers as a list avoids formatting them into a script.
+BATCH_COORDS_PROC = "batch_coords"
+BATCH_COORDS_SCRIPT = (
+    "proc batch_coords {canvas moves} {"
+    " foreach {item x0 y0 x1 y1} $moves { $canvas coords $item $x0 $y0 $x1 $y1 } "
+    "}"
+)
+
+# Tcl proc that recolors a frame's new particles: item, color pairs
+BATCH_FILL_PROC = "batch_fill"
+BATCH_FILL_SCRIPT = (
+    "proc batch_fill {canvas fills} {"
+    " foreach {item color} $fills { $canvas itemconfigure $item -fill $color } "
+    "}"
+)
+
+# Coordinates that park an unused particle item (zero size draws nothing)
+PARKED = (-10, -10, -10, -10)
+
+
+class CanvasRenderer:
+    # Draws a Simulation onto a Tk canvas.
+    #
+    # The renderer never changes game state. After each simulation step it
+    # returns the items of removed entities (EntityStore.released) to their
+    # pool, takes items for new entities (view == 0) and moves everything else.
+    #
+    # Every canvas.coords() call is a separate Python -> Tcl round trip. With
+    # batch_coords the moves of a frame are queued instead and applied by one
+    # call to BATCH_COORDS_PROC at the end of draw().
+    #
+    # Items are only moved once their entity is at least `min_move` pixels
+    # from where the item was last drawn (the drawn_x/drawn_y columns).
+    # Entities entirely outside the screen hand their item back to the pool
+    # and get one again if they come back. `touched`, `skipped` and `culled`
+    # count the items changed, left alone and put away by the last draw().
+    #
+    # Hit sparks and death bursts come from a ParticleSystem of
+    # `particle_cap` slots, each with one canvas item made up front. A
+    # frame moves the live ones, parks expired ones out of sight and
+    # recolors reused ones, all through the same batched calls, so
+    # particles never create or delete canvas items. particle_ms is the
+    # cost of the last frame's particle pass.
+    #
+    # Without a `pool_cap`, each pool keeps as many items as its entities
+    # can number at once under sim.limits (both shot kinds for the
+    # projectile pool), so a full barrage never makes a pool delete items it
+    # will have to create again.
+    def __init__(self, canvas, sim, pool_prealloc=64, pool_cap=None, batch_coords=True, min_move=1.0,
+                 particle_cap=512):
+        self.canvas = canvas
+        self.sim = sim
+        self.player = None
+        self.telegraphs = {}  # boss handle -> "!" text item
+        self.min_move = min_move
+        self.touched = 0
+        self.skipped = 0
+        self.culled = 0
+
+        # Moves queued for the end-of-frame flush
+        self.batch_coords = batch_coords
+        self.canvas_path = str(canvas)
+        self.pending_coords = []
+        if batch_coords:
+            canvas.tk.eval(BATCH_COORDS_SCRIPT)
+            canvas.tk.eval(BATCH_FILL_SCRIPT)
+            self.move = self.queue_coords
+        else:
+            self.move = canvas.coords
+
+        # Effect particles, fed from the simulation's effect events
+        self.particles = ParticleSystem(particle_cap)
+        self.particle_ms = 0.0
+        sim.effects = []
+
+        # Hidden items reused by enemies (rectangles) and projectiles (ovals)
+        limits = sim.limits
+        enemy_cap = pool_cap or limits.cap("enemy", 0) + 1  # and the boss
+        projectile_cap = pool_cap or limits.cap("player_shot", 0) + limits.cap("boss_shot", 0)
+        self.enemy_pool = ItemPool(canvas, "rectangle", pool_prealloc, enemy_cap)
+        self.projectile_pool = ItemPool(canvas, "oval", pool_prealloc, projectile_cap)
+
+        self.rebuild()
+
+    def rebuild(self):
+        # Forget every canvas item (the canvas was just cleared) and recreate
+        # the world on the next draw()
+        sim = self.sim
+        sim.enemies.forget_views()
+        sim.projectiles.forget_views()
+        self.telegraphs = {}
+        self.enemy_pool.reset()
+        self.projectile_pool.reset()
+
+        # Walls, below every other item (pooled items may predate them)
+        self.obstacle_items = [
+            self.canvas.create_rectangle(x0, y0, x1, y1, fill="gray40", outline="gray25", width=2, tags="obstacle")
+            for x0, y0, x1, y1 in sim.arena.obstacles
+        ]
+        if sim.arena.obstacles:
+            self.canvas.tag_lower("obstacle")
+
+        # Main player (larger rectangle)
+        self.player_drawn = (sim.player_x, sim.player_y)
+        self.player = self.canvas.create_rectangle(
+            sim.player_x - 25, sim.player_y - 25,
+            sim.player_x + 25, sim.player_y + 25,
+            fill="blue", outline="darkblue", width=2
+        )
+
+        # One parked item per particle slot
+        self.reset_particles()
+        capacity = self.particles.capacity
+        self.particle_items = [
+            self.canvas.create_rectangle(*PARKED, fill=PARTICLE_COLORS[0], width=0) for _ in range(capacity)
+        ]
+        self.particle_shown = bytearray(capacity)
+        self.particle_fill = array("B", bytes(capacity))  # color index each item has
+
+    def draw(self):
+        sim = self.sim
+        enemies = sim.enemies
+        projectiles = sim.projectiles
+        touched = 0
+        skipped = 0
+        culled = 0
+
+        # Return items of entities removed since the last draw to their pool
+        for store, pool in ((enemies, self.enemy_pool), (projectiles, self.projectile_pool)):
+            for item in store.released:
+                pool.release(item)
+            touched += len(store.released)
+            del store.released[:]
+
+        move = self.move
+        min_move = self.min_move
+        width = sim.screen_width
+        height = sim.screen_height
+
+        # Update player position on canvas
+        px = sim.player_x
+        py = sim.player_y
+        if abs(px - self.player_drawn[0]) >= min_move or abs(py - self.player_drawn[1]) >= min_move:
+            move(self.player, px - 25, py - 25, px + 25, py + 25)
+            self.player_drawn = (px, py)
+            touched += 1
+        else:
+            skipped += 1
+
+        # Enemies (bosses are larger)
+        pool = self.enemy_pool
+        xs, ys, flags, views = enemies.x, enemies.y, enemies.flags, enemies.view
+        drawn_xs, drawn_ys = enemies.drawn_x, enemies.drawn_y
+        for i in range(len(enemies)):
+            ex = xs[i]
+            ey = ys[i]
+            is_boss = flags[i] & FLAG_BOSS
+            size = 40 if is_boss else 20
+            if ex + size < 0 or ex - size > width or ey + size < 0 or ey - size > height:
+                # Off screen: give the item back until the enemy returns
+                if views[i]:
+                    pool.release(views[i])
+                    views[i] = 0
+                    touched += 1
+                    culled += 1
+                continue
+            if not views[i]:
+                if is_boss:
+                    views[i] = pool.acquire(
+                        (ex - size, ey - size, ex + size, ey + size),
+                        fill="darkred", outline="red", width=4
+                    )
+                else:
+                    views[i] = pool.acquire(
+                        (ex - size, ey - size, ex + size, ey + size),
+                        fill="red", outline="darkred", width=2
+                    )
+            elif abs(ex - drawn_xs[i]) >= min_move or abs(ey - drawn_ys[i]) >= min_move:
+                move(
+                    views[i],
+                    ex - size, ey - size,
+                    ex + size, ey + size
+                )
+            else:
+                skipped += 1
+                continue
+            drawn_xs[i] = ex
+            drawn_ys[i] = ey
+            touched += 1
+
+        # Projectiles (orange for boss shots, upgrade color for the player's)
+        pool = self.projectile_pool
+        xs, ys, flags, views = projectiles.x, projectiles.y, projectiles.flags, projectiles.view
+        drawn_xs, drawn_ys = projectiles.drawn_x, projectiles.drawn_y
+        for i in range(len(projectiles)):
+            x = xs[i]
+            y = ys[i]
+            if x + 8 < 0 or x - 8 > width or y + 8 < 0 or y - 8 > height:
+                if views[i]:
+                    pool.release(views[i])
+                    views[i] = 0
+                    touched += 1
+                    culled += 1
+                continue
+            if not views[i]:
+                if flags[i] & FLAG_HOSTILE:
+                    fill_color, outline_color = "orange", "red"
+                    tag = BOSS_SHOT_TAG
+                else:
+                    fill_color, outline_color = BULLET_COLORS[min(sim.bullet_color_level, 4)]
+                    tag = PLAYER_SHOT_TAG
+                views[i] = pool.acquire(
+                    (x - 8, y - 8, x + 8, y + 8),
+                    fill=fill_color, outline=outline_color, width=2, tags=tag
+                )
+            elif abs(x - drawn_xs[i]) >= min_move or abs(y - drawn_ys[i]) >= min_move:
+                move(
+                    views[i],
+                    x - 8, y - 8,
+                    x + 8, y + 8
+                )
+            else:
+                skipped += 1
+                continue
+            drawn_xs[i] = x
+            drawn_ys[i] = y
+            touched += 1
+
+        self.draw_particles()
+        self.flush_coords()
+        self.draw_telegraphs()
+        self.touched = touched
+        self.skipped = skipped
+        self.culled = culled
+
+    def reset_particles(self):
+        # Drop every particle and pending effect (new canvas or new run)
+        self.particles.clear()
+        del self.sim.effects[:]
+        self.particle_time = self.sim.time_ms
+
+    def advance_particles(self):
+        # Emit this frame's effects and age the particles by the
+        # simulation time since the last frame (none while paused)
+        sim = self.sim
+        particles = self.particles
+        if sim.effects:
+            particles.emit_effects(sim.effects)
+        elapsed = sim.time_ms - self.particle_time
+        self.particle_time = sim.time_ms
+        if elapsed > 0:
+            particles.update(elapsed / TICK_MS)
+
+    def draw_particles(self):
+        start = time.perf_counter()
+        self.advance_particles()
+        particles = self.particles
+        items = self.particle_items
+        shown = self.particle_shown
+        item_fill = self.particle_fill
+        move = self.move
+        half = PARTICLE_SIZE / 2
+        xs, ys, life, color = particles.x, particles.y, particles.life, particles.color
+        fills = []
+        for slot in range(particles.capacity):
+            if life[slot] > 0:
+                x = xs[slot]
+                y = ys[slot]
+                move(items[slot], x - half, y - half, x + half, y + half)
+                if item_fill[slot] != color[slot]:
+                    item_fill[slot] = color[slot]
+                    fills.extend((items[slot], PARTICLE_COLORS[color[slot]]))
+                shown[slot] = 1
+            elif shown[slot]:
+                move(items[slot], *PARKED)
+                shown[slot] = 0
+        if fills:
+            if self.batch_coords:
+                self.canvas.tk.call(BATCH_FILL_PROC, self.canvas_path, tuple(fills))
+            else:
+                for k in range(0, len(fills), 2):
+                    self.canvas.itemconfig(fills[k], fill=fills[k + 1])
+        self.particle_ms = (time.perf_counter() - start) * 1000
+
+    def queue_coords(self, item, x0, y0, x1, y1):
+        # canvas.coords() for the end-of-frame flush
+        self.pending_coords.extend((item, x0, y0, x1, y1))
+
+    def flush_coords(self):
+        # Apply every queued move in one Tcl round trip
+        if self.pending_coords:
+            self.canvas.tk.call(BATCH_COORDS_PROC, self.canvas_path, tuple(self.pending_coords))
+            del self.pending_coords[:]
+
+    def restyle_player_shots(self):
+        # Give every player bullet the current upgrade color in one call
+        fill_color, outline_color = BULLET_COLORS[min(self.sim.bullet_color_level, 4)]
+        self.canvas.itemconfig(PLAYER_SHOT_TAG, fill=fill_color, outline=outline_color)
+
+    def draw_telegraphs(self):
+        # Show a "!" above a boss that is about to rush, and remove it once the
+        # attack fires or the boss dies
+        enemies = self.sim.enemies
+        for handle, item in list(self.telegraphs.items()):
+            if not enemies.alive(handle) or not enemies.telegraph[enemies.index_of[handle]]:
+                self.canvas.delete(item)
+                del self.telegraphs[handle]
+
+        boss = self.sim.current_boss
+        if boss is not None and boss not in self.telegraphs and enemies.alive(boss):
+            i = enemies.index_of[boss]
+            if enemies.telegraph[i]:
+                self.telegraphs[boss] = self.canvas.create_text(
+                    enemies.x[i], enemies.y[i] - 60,
+                    text="!",
+                    font=("Arial", 48, "bold"),
+                    fill="yellow"
+                )
+
+    def items(self):
+        # Every canvas item the renderer owns (see audit.py)
+        sim = self.sim
+        items = [self.player]
+        items += self.obstacle_items
+        items += self.telegraphs.values()
+        items += self.particle_items
+        for store, pool in ((sim.enemies, self.enemy_pool), (sim.projectiles, self.projectile_pool)):
+            items += [view for view in store.view if view]
+            items += store.released  # not yet returned to the pool
+            items += pool.free
+        return items
+
+    def pool_stats(self):
+        return {"enemies": self.enemy_pool.stats(), "projectiles": self.projectile_pool.stats()}
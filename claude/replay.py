@@ -0,0 +1,183 @@
+import argparse
+import base64
+import json
+import struct
+import time
+import zlib
+
+from simulation import Simulation, TICK_MS
+
+# Bumped whenever the file layout or the simulation rules change in a way
+# that breaks old recordings
+REPLAY_VERSION = 5
+
+# Held keys are stored as one byte per tick
+KEY_BITS = {'w': 1, 'a': 2, 's': 4, 'd': 8, 'up': 16, 'down': 32, 'left': 64, 'right': 128}
+MASK_KEYS = [frozenset(key for key, bit in KEY_BITS.items() if mask & bit) for mask in range(256)]
+
+# Ticks between state checksums in a recording
+CHECK_INTERVAL = 60
+
+
+def key_mask(inputs):
+    mask = 0
+    for key in inputs:
+        mask |= KEY_BITS.get(key, 0)
+    return mask
+
+
+def state_digest(sim):
+    # CRC of the state a replay has to reproduce (counters, player, entity
+    # columns). Renderer-owned columns (RENDER_COLUMNS) are left out.
+    crc = zlib.crc32(struct.pack(
+        "<3d6q2?",
+        sim.time_ms, sim.player_x, sim.player_y,
+        sim.player_current_hp, sim.player_max_hp, sim.enemies_killed,
+        sim.wave_number, sim.boss_number, sim.shop_count,
+        sim.game_over, sim.shop_open
+    ))
+    for store in (sim.enemies, sim.projectiles):
+        for name in store.column_names:
+            if name not in store.RENDER_COLUMNS:
+                crc = zlib.crc32(getattr(store, name), crc)
+    return crc
+
+
+class InputRecorder:
+    # Records what a Simulation needs to replay a session: its seed, the keys
+    # held on every tick (run-length encoded), shop choices, test kills,
+    # restarts, snapshot restores and load level changes, plus a state
+    # checksum every `check_interval` ticks so a replay can tell where it
+    # stopped matching.
+    #
+    # Ticks must all be TICK_MS long, which is what the game loop and the
+    # headless runner use.
+    def __init__(self, check_interval=CHECK_INTERVAL):
+        self.check_interval = check_interval
+
+    def attach(self, sim):
+        # Start recording sim, which must be at the start of a run (new or
+        # just reset)
+        self.sim = sim
+        self.seed = sim.seed
+        self.screen = (sim.screen_width, sim.screen_height)
+        self.obstacles = sim.obstacles
+        self.runs = []  # [key mask, ticks held]
+        self.events = []  # [tick, kind, value]
+        self.checks = []  # [tick, state digest]
+        self.ticks = 0
+        sim.recorder = self
+
+    def record_tick(self, dt, inputs):
+        # Called by Simulation.step before it changes any state
+        if dt != TICK_MS:
+            raise ValueError(f"replays need {TICK_MS} ms ticks, got {dt}")
+        if self.ticks % self.check_interval == 0:
+            self.checks.append([self.ticks, state_digest(self.sim)])
+        mask = key_mask(inputs)
+        runs = self.runs
+        if runs and runs[-1][0] == mask:
+            runs[-1][1] += 1
+        else:
+            runs.append([mask, 1])
+        self.ticks += 1
+
+    def record_event(self, kind, value=None):
+        # kind is "shop" (value = upgrade), "kills", "reset" (value = seed),
+        # "restore" (value = base64 snapshot) or "load" (value = load level)
+        self.events.append([self.ticks, kind, value])
+
+    def to_dict(self):
+        return {
+            "version": REPLAY_VERSION,
+            "seed": self.seed,
+            "screen": list(self.screen),
+            "obstacles": self.obstacles,
+            "ticks": self.ticks,
+            "inputs": self.runs,
+            "events": self.events,
+            "checks": self.checks + [[self.ticks, state_digest(self.sim)]],
+        }
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, separators=(",", ":"))
+
+
+def load_replay(path):
+    with open(path) as f:
+        data = json.load(f)
+    if data.get("version") != REPLAY_VERSION:
+        raise ValueError(f"{path}: replay version {data.get('version')}, expected {REPLAY_VERSION}")
+    return data
+
+
+def replay(data, sim=None):
+    # Run a recording (from InputRecorder.to_dict or load_replay) as fast as
+    # possible. Returns (sim, tick of the first failed checksum or None).
+    if sim is None:
+        sim = Simulation(*data["screen"], seed=data["seed"], obstacles=data["obstacles"])
+    else:
+        sim.reset(data["seed"])
+    events = data["events"]
+    checks = dict(data["checks"])
+    next_event = 0
+    divergence = None
+    tick = 0
+
+    def apply_events():
+        nonlocal next_event
+        while next_event < len(events) and events[next_event][0] == tick:
+            _, kind, value = events[next_event]
+            if kind == "shop":
+                sim.buy_upgrade(value)
+            elif kind == "kills":
+                sim.add_test_kills()
+            elif kind == "reset":
+                sim.reset(value)
+            elif kind == "restore":
+                sim.restore(base64.b64decode(value))
+            elif kind == "load":
+                sim.set_load_level(value)
+            else:
+                raise ValueError(f"unknown replay event: {kind!r}")
+            next_event += 1
+
+    step = sim.step
+    for mask, count in data["inputs"]:
+        keys = MASK_KEYS[mask]
+        for _ in range(count):
+            apply_events()
+            if divergence is None and tick in checks and state_digest(sim) != checks[tick]:
+                divergence = tick
+            step(TICK_MS, keys)
+            tick += 1
+
+    apply_events()
+    if divergence is None and tick in checks and state_digest(sim) != checks[tick]:
+        divergence = tick
+    return sim, divergence
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded game without a display.")
+    parser.add_argument("path", help="replay file written with --record")
+    args = parser.parse_args()
+
+    data = load_replay(args.path)
+    start = time.perf_counter()
+    sim, divergence = replay(data)
+    elapsed = time.perf_counter() - start
+    ticks = data["ticks"]
+    print(f"{ticks} ticks in {elapsed:.2f}s ({ticks / max(elapsed, 1e-9):.0f} ticks/s, "
+          f"{ticks * TICK_MS / 1000 / max(elapsed, 1e-9):.0f}x real time)")
+    print(f"kills={sim.enemies_killed} wave={sim.wave_number} bosses={sim.boss_number} game_over={sim.game_over}")
+    if divergence is None:
+        print("replay matches the recording")
+    else:
+        print(f"replay diverges from the recording at tick {divergence}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
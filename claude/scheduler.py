@@ -0,0 +1,61 @@
+import heapq
+
+
+class Scheduler:
+    # Delayed actions keyed on simulation time.
+    #
+    # Events live in a binary heap ordered by (due time, schedule order), so
+    # scheduling and firing an event are O(log n) and events due at the same
+    # time run in the order they were scheduled. schedule() returns a timer
+    # handle that cancel() accepts; cancelled events stay in the heap and are
+    # skipped when they come up. The owner decides what "now" is, so nothing
+    # fires while the simulation is paused.
+    def __init__(self):
+        self.heap = []  # [due, handle, callback, args]
+        self.pending = {}  # timer handle -> heap entry
+        self.next_handle = 1
+        self.now = 0.0
+
+    def __len__(self):
+        return len(self.pending)
+
+    def clear(self, now=0.0):
+        # Drop every event and restart the clock at `now`
+        self.heap = []
+        self.pending = {}
+        self.now = now
+
+    def schedule(self, delay, callback, *args):
+        # Run callback(*args) `delay` ms from now
+        return self.schedule_at(self.now + delay, callback, *args)
+
+    def schedule_at(self, due, callback, *args):
+        # Run callback(*args) at time `due`. Events due now or in the past
+        # run on the next call to run_due(), never the current one.
+        handle = self.next_handle
+        self.next_handle += 1
+        entry = [max(due, self.now), handle, callback, args]
+        heapq.heappush(self.heap, entry)
+        self.pending[handle] = entry
+        return handle
+
+    def cancel(self, handle):
+        # Drop a pending event; unknown or already-run handles are ignored
+        entry = self.pending.pop(handle, None)
+        if entry is not None:
+            entry[2] = None
+
+    def run_due(self, now):
+        # Advance to `now` and run every event due by then
+        self.now = now
+        heap = self.heap
+        first_new = self.next_handle
+        while heap and heap[0][0] <= now:
+            if heap[0][1] >= first_new:
+                # Scheduled by one of these callbacks, wait for the next call
+                break
+            _, handle, callback, args = heapq.heappop(heap)
+            if callback is None:
+                continue
+            del self.pending[handle]
+            callback(*args)
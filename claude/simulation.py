@@ -0,0 +1,872 @@
+import argparse
+import base64
+import math
+import random
+import time
+
+from arena import Arena
+from entities import EntityStore, FLAG_BOSS, FLAG_HOMING, FLAG_HOSTILE
+from kernels import default_kernel
+from limits import EntityLimits, MAX_LOAD_LEVEL
+from patterns import angle_step, barrage_for_level, burst_velocities
+from profiler import PhaseProfiler
+from scheduler import Scheduler
+from snapshot import load_state, save_state
+from spatial import SpatialGrid, swept_circle_hit
+from steering import Steering
+
+# One simulation tick; movement speeds are in pixels per tick
+TICK_MS = 16
+
+# Shop upgrades, in the order the shop shows them
+UPGRADES = ("gun", "bazooka", "shoes", "color", "heart", "homing")
+
+# Homing shots only chase enemies this close (pixels), and turn by at most
+# this many radians per tick for each homing level
+HOMING_RANGE = 400
+HOMING_TURN_RATE = 0.04
+
+# Half the player's size, for keeping it out of walls
+PLAYER_HALF_SIZE = 25
+
+
+class Simulation:
+    # Game state and rules with no Tkinter dependency.
+    #
+    # The simulation only knows about positions, timers and counters. A
+    # renderer observes it after each step (see renderer.CanvasRenderer), and
+    # the headless runner at the bottom of this file drives it with no display
+    # at all. Time only moves when step() is called, so a paused game (shop,
+    # game over) freezes every cooldown and delayed boss attack with it.
+    #
+    # All randomness comes from self.rng, seeded per run by reset(), and all
+    # timing from self.time_ms, so a seed plus the inputs fed to step()
+    # reproduce a run exactly (see replay.py).
+    #
+    # Enemy spawns, boss shots and boss specials are timer events on
+    # self.scheduler rather than per-tick cooldown checks. Events that act on
+    # an entity carry its store handle, so they do nothing once it is gone.
+    #
+    # With obstacles on, the arena has walls (see arena.py) that stop the
+    # player and all projectiles, and enemies path around them by following
+    # a flow field towards the player.
+    def __init__(self, screen_width=1920, screen_height=1080, seed=None, obstacles=True, kernel=None):
+        self.screen_width = screen_width
+        self.screen_height = screen_height
+
+        # Static walls, and the flow field enemies follow around them
+        self.obstacles = obstacles
+        self.arena = Arena(screen_width, screen_height)
+        if obstacles:
+            self.arena.add_default_obstacles(screen_width, screen_height)
+
+        self.player_speed = 5
+        self.enemy_speed = self.player_speed / 2
+
+        # Cooldowns (in milliseconds of simulation time)
+        self.enemy_spawn_cooldown = 2000  # 2 seconds
+        self.shoot_cooldown = 200  # 0.2 seconds
+        self.boss_shoot_cooldown = 2000  # 2 seconds
+        self.boss_special_cooldown = 10000  # 10 seconds
+
+        # Projectile store (x, y, dx, dy, FLAG_HOSTILE for boss shots, which
+        # it counts for the shot caps)
+        self.projectiles = EntityStore(counted_flag=FLAG_HOSTILE)
+
+        # Enemy store (x, y, hp, FLAG_BOSS, boss level and telegraph marker)
+        self.enemies = EntityStore(extra_columns=(("level", "i"), ("telegraph", "q")))
+
+        # Enemy broadphase grid (cell >= largest hit radius), rebuilt every
+        # tick for projectile-vs-enemy collision and homing shots
+        self.enemy_grid = SpatialGrid(cell_size=64)
+
+        # Batched movement/culling passes (NumPy when installed, else pure
+        # Python, or the one named by `kernel`: "python" or "numpy")
+        self.kernel = default_kernel(kernel)
+
+        # How enemies spread out while chasing (separation/cohesion weights)
+        self.steering = Steering()
+
+        # Per-phase tick timer (disabled until someone turns it on)
+        self.profiler = PhaseProfiler()
+
+        # Timer events (enemy spawns, boss attacks), run on simulation time
+        self.scheduler = Scheduler()
+
+        # Per-kind entity caps and their counters
+        self.limits = EntityLimits()
+
+        # Records inputs for replay when set (see replay.InputRecorder)
+        self.recorder = None
+
+        # Cosmetic events (kind, x, y, dx, dy) for a renderer's particles
+        # (see particles.EFFECTS) when set to a list; the renderer empties it
+        self.effects = None
+
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        # Put every piece of game state back to the start of a run. Runs
+        # with the same seed and inputs play out identically.
+        if seed is None:
+            seed = random.randrange(2**32)
+        # Any int is a valid --seed; keep it in the unsigned 64-bit range the
+        # snapshot stores, and seed the rng with that same value
+        seed %= 2**64
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.time_ms = 0.0
+
+        self.projectiles.clear()
+        self.enemies.clear()
+
+        # Player position (center of screen)
+        self.player_x = self.screen_width // 2
+        self.player_y = self.screen_height // 2
+
+        # Drop timers from the previous run
+        self.scheduler.clear(self.time_ms)
+
+        # Start timers now to prevent immediate spawns/shots
+        self.last_shoot_time = self.time_ms
+        self.last_enemy_spawn = self.time_ms
+        self.spawn_timer = self.schedule(self.enemy_spawn_cooldown, self.spawn_tick)
+
+        # Game state
+        self.game_over = False
+        self.shop_open = False
+
+        # How much optional load to shed (0 = none, see limits.MAX_LOAD_LEVEL)
+        self.load_level = 0
+
+        # Score tracking
+        self.enemies_killed = 0
+        self.wave_number = 1
+        self.enemies_killed_this_wave = 0
+
+        # Upgrades
+        self.bullet_speed_multiplier = 1.0
+        self.bazooka_level = 0  # 0 = no bazooka, 1 = opposite direction, 2 = random direction
+        self.player_speed_multiplier = 1.0
+        self.bullet_damage = 1.0
+        self.bullet_color_level = 0  # 0=yellow, 1=dark blue, 2=purple, 3=turquoise, 4=black
+        self.homing_level = 0  # 0 = straight shots, higher levels turn faster
+
+        # Player health
+        self.player_max_hp = 1
+        self.player_current_hp = 1
+
+        # Enemy stats
+        self.enemy_max_health = 1
+        self.enemy_speed_multiplier = 1.0
+        self.shop_count = 0
+        self.last_shop_kills = 0  # Track when last shop was opened
+        self.last_boss_spawn_kills = 0  # Track when last boss was spawned
+
+        # Boss tracking
+        self.boss_number = 0
+        self.current_boss = None  # Handle of the live boss
+        self.boss_spawn_time = 0
+
+        self.limits.rebuild(self)
+        if self.recorder is not None:
+            self.recorder.record_event("reset", seed)
+
+    def snapshot(self):
+        # Compact binary copy of the whole game state (see snapshot.py)
+        return save_state(self)
+
+    def restore(self, data):
+        # Go back to a snapshot() taken from this game
+        load_state(self, data)
+        self.limits.rebuild(self)
+        if self.recorder is not None:
+            self.recorder.record_event("restore", base64.b64encode(data).decode("ascii"))
+
+    def set_load_level(self, level):
+        # Called by the front end's LoadGovernor when it changes level
+        level = max(0, min(level, MAX_LOAD_LEVEL))
+        if level == self.load_level:
+            return
+        counter = "load_raised" if level > self.load_level else "load_lowered"
+        self.limits.counters[counter] += 1
+        self.load_level = level
+        if self.recorder is not None:
+            self.recorder.record_event("load", level)
+
+    def add_projectile(self, **values):
+        # Add a projectile within its cap (None if the cap refused it)
+        projectiles = self.projectiles
+        hostile = projectiles.flagged
+        if values.get("flags", 0) & FLAG_HOSTILE:
+            kind, count = "boss_shot", hostile
+        else:
+            kind, count = "player_shot", len(projectiles) - hostile
+        if not self.limits.admit(self, kind, count):
+            return None
+        handle = projectiles.add(**values)
+        self.limits.spawned(kind, handle, projectiles)
+        return handle
+
+    def add_projectiles(self, count, **values):
+        # Add `count` projectiles of one kind at once (values as for
+        # EntityStore.add_many), as many as the cap lets in. Returns their
+        # handles.
+        projectiles = self.projectiles
+        hostile = projectiles.flagged
+        if values.get("flags", 0) & FLAG_HOSTILE:
+            kind, live = "boss_shot", hostile
+        else:
+            kind, live = "player_shot", len(projectiles) - hostile
+        admitted = self.limits.admit_many(self, kind, live, count)
+        if admitted < count:
+            values = {
+                name: value if isinstance(value, (int, float)) else value[:admitted]
+                for name, value in values.items()
+            }
+        handles = projectiles.add_many(admitted, **values)
+        self.limits.spawned_many(kind, handles, projectiles)
+        return handles
+
+    def add_enemy(self, **values):
+        # Add a non-boss enemy within its cap (None if refused or merged)
+        enemies = self.enemies
+        count = len(enemies) - (self.current_boss is not None)
+        if not self.limits.admit(self, "enemy", count, values.get("hp", 0.0)):
+            return None
+        handle = enemies.add(**values)
+        self.limits.spawned("enemy", handle, enemies)
+        return handle
+
+    def effect(self, kind, x, y, dx=0.0, dy=0.0):
+        # Note a cosmetic event if anyone is listening
+        if self.effects is not None:
+            self.effects.append((kind, x, y, dx, dy))
+
+    def add_test_kills(self):
+        # Add 20 kills for testing
+        if self.recorder is not None:
+            self.recorder.record_event("kills")
+        self.enemies_killed += 20
+        self.enemies_killed_this_wave += 20
+
+    def schedule(self, delay, callback, *args):
+        # Run callback(*args) once `delay` ms of simulation time have passed.
+        # Returns a timer handle for self.scheduler.cancel().
+        return self.scheduler.schedule_at(self.time_ms + delay, callback, *args)
+
+    def spawn_tick(self):
+        # Enemy spawn timer. Spawning stops while a boss is alive and picks
+        # up again once it is defeated (see step).
+        if self.current_boss is not None:
+            self.spawn_timer = None
+            return
+        # Runs among the boss timers in step(): charge what ran before it to
+        # "boss" and the spawn itself to "spawn"
+        mark = self.profiler.mark
+        mark("boss")
+        self.spawn_enemy()
+        self.last_enemy_spawn = self.time_ms
+        self.spawn_timer = self.schedule(self.enemy_spawn_cooldown, self.spawn_tick)
+        mark("spawn")
+
+    def boss_shoot(self, boss_handle):
+        # Boss shot timer: fire at the player every boss_shoot_cooldown ms
+        if not self.enemies.alive(boss_handle):
+            return
+        enemies = self.enemies
+        i = enemies.index_of[boss_handle]
+        ex = enemies.x[i]
+        ey = enemies.y[i]
+        distance = math.sqrt((self.player_x - ex)**2 + (self.player_y - ey)**2)
+        if distance == 0:
+            # On top of the player, try again next tick
+            self.schedule(0, self.boss_shoot, boss_handle)
+            return
+        shoot_dx = (self.player_x - ex) / distance
+        shoot_dy = (self.player_y - ey) / distance
+        self.add_projectile(x=ex, y=ey, dx=shoot_dx * 6, dy=shoot_dy * 6, flags=FLAG_HOSTILE)
+        self.schedule(self.boss_shoot_cooldown, self.boss_shoot, boss_handle)
+
+    def boss_barrage(self, boss_handle, volley, burst):
+        # Barrage timer (bosses of level 3+): fire burst `burst` of volley
+        # `volley` of the boss's barrage (see patterns.py) as one batch
+        if not self.enemies.alive(boss_handle):
+            return
+        enemies = self.enemies
+        i = enemies.index_of[boss_handle]
+        ex = enemies.x[i]
+        ey = enemies.y[i]
+        barrage = barrage_for_level(enemies.level[i])
+        current = barrage[volley]
+        aim = angle_step(math.atan2(self.player_y - ey, self.player_x - ex))
+        dxs, dys = burst_velocities(current.pattern, burst, aim)
+        self.add_projectiles(len(dxs), x=ex, y=ey, dx=dxs, dy=dys, flags=FLAG_HOSTILE)
+
+        burst += 1
+        if burst == current.bursts:
+            volley = (volley + 1) % len(barrage)
+            burst = 0
+        self.schedule(current.interval, self.boss_barrage, boss_handle, volley, burst)
+
+    def boss_special(self, boss_handle):
+        # Boss special timer (bosses of level 1+)
+        if not self.enemies.alive(boss_handle):
+            return
+        enemies = self.enemies
+        i = enemies.index_of[boss_handle]
+        if enemies.telegraph[i]:
+            # Previous special still telegraphed, try again next tick
+            self.schedule(0, self.boss_special, boss_handle)
+            return
+
+        # Boss 2+ (level 1+): Rush to center and shoot 8 directions.
+        # Show telegraph, then rush after 1 second.
+        enemies.telegraph[i] = 1
+        self.schedule(1000, self.boss_rush_attack, boss_handle, enemies.x[i], enemies.y[i])
+
+        # Boss 3+ (level 2+): Also summon 2 seconds after the rush telegraph
+        if enemies.level[i] >= 2:
+            self.schedule(2000, self.boss_summon_attack, boss_handle)
+
+        # Next special once the cooldown has passed and the rush has cleared
+        # the telegraph (scheduled after the rush, so it runs after it)
+        self.schedule(max(self.boss_special_cooldown, 1000), self.boss_special, boss_handle)
+
+    def shoot_projectile(self, dx, dy):
+        self.effect("muzzle", self.player_x, self.player_y, dx, dy)
+
+        # Store projectile info
+        base_speed = 8 * self.bullet_speed_multiplier
+        flags = FLAG_HOMING if self.homing_level else 0
+        self.add_projectile(x=self.player_x, y=self.player_y, dx=dx * base_speed, dy=dy * base_speed, flags=flags)
+
+        # If bazooka upgrade level 1, shoot extra bullet in opposite direction
+        if self.bazooka_level == 1:
+            self.add_projectile(x=self.player_x, y=self.player_y, dx=-dx * base_speed, dy=-dy * base_speed, flags=flags)
+
+        # If bazooka upgrade level 2, shoot extra bullet in random direction
+        elif self.bazooka_level >= 2:
+            # Shoot opposite direction bullet
+            self.add_projectile(x=self.player_x, y=self.player_y, dx=-dx * base_speed, dy=-dy * base_speed, flags=flags)
+
+            # Shoot random direction bullet (the first thing shed under load).
+            # The angle is drawn either way so shedding doesn't shift the rng.
+            random_angle = self.rng.uniform(0, 2 * math.pi)
+            if self.load_level >= 1:
+                self.limits.counters["shed_bazooka"] += 1
+                return
+            random_dx = math.cos(random_angle)
+            random_dy = math.sin(random_angle)
+            self.add_projectile(
+                x=self.player_x, y=self.player_y, dx=random_dx * base_speed, dy=random_dy * base_speed, flags=flags
+            )
+
+    def boss_rush_attack(self, boss_handle, start_x=None, start_y=None):
+        # Check if boss still exists
+        if not self.enemies.alive(boss_handle):
+            return
+        enemies = self.enemies
+        boss_idx = enemies.index_of[boss_handle]
+
+        # Remove telegraph icon
+        enemies.telegraph[boss_idx] = 0
+
+        # Move boss to center
+        center_x = self.screen_width // 2
+        center_y = self.screen_height // 2
+        enemies.x[boss_idx] = center_x
+        enemies.y[boss_idx] = center_y
+
+        # Shoot projectiles in 8 directions
+        directions = [
+            (0, -1),   # Up
+            (1, -1),   # Up-right
+            (1, 0),    # Right
+            (1, 1),    # Down-right
+            (0, 1),    # Down
+            (-1, 1),   # Down-left
+            (-1, 0),   # Left
+            (-1, -1)   # Up-left
+        ]
+
+        for dx, dy in directions:
+            self.add_projectile(x=center_x, y=center_y, dx=dx * 10, dy=dy * 10, flags=FLAG_HOSTILE)
+
+    def boss_summon_attack(self, boss_handle):
+        # Check if boss still exists
+        if not self.enemies.alive(boss_handle):
+            return
+        enemies = self.enemies
+        boss_idx = enemies.index_of[boss_handle]
+
+        # Remove telegraph icon
+        enemies.telegraph[boss_idx] = 0
+
+        # Get boss position
+        boss_x = enemies.x[boss_idx]
+        boss_y = enemies.y[boss_idx]
+
+        # Spawn enemy near boss, at a random diagonal
+        spawn_offset = 100
+        offset_x = self.rng.choice([-spawn_offset, spawn_offset])
+        offset_y = self.rng.choice([-spawn_offset, spawn_offset])
+
+        # On the first diagonal (from the random one) that is clear of the
+        # walls and within screen bounds, or on the boss if none is
+        arena = self.arena
+        x, y = boss_x, boss_y
+        for flip_x, flip_y in ((1, 1), (-1, 1), (1, -1), (-1, -1)):
+            spot_x = max(50, min(boss_x + offset_x * flip_x, self.screen_width - 50))
+            spot_y = max(50, min(boss_y + offset_y * flip_y, self.screen_height - 50))
+            if not arena.point_blocked(spot_x, spot_y):
+                x, y = spot_x, spot_y
+                break
+
+        # Store enemy info with 3 HP
+        self.add_enemy(x=x, y=y, hp=3)
+
+    def spawn_boss(self):
+        # Spawn boss at random edge of screen
+        edge = self.rng.choice(['top', 'bottom', 'left', 'right'])
+
+        if edge == 'top':
+            x = self.rng.randint(100, self.screen_width - 100)
+            y = 100
+        elif edge == 'bottom':
+            x = self.rng.randint(100, self.screen_width - 100)
+            y = self.screen_height - 100
+        elif edge == 'left':
+            x = 100
+            y = self.rng.randint(100, self.screen_height - 100)
+        else:  # right
+            x = self.screen_width - 100
+            y = self.rng.randint(100, self.screen_height - 100)
+
+        # Calculate boss health (50, 100, 200, 400, ...)
+        boss_health = 50 * (2 ** self.boss_number)
+
+        # Store boss info
+        # level: 0=first boss (projectiles only), 1=second boss (adds rush attack), 2+=third boss (adds summon),
+        # 3+=fourth boss (adds a bullet barrage, see patterns.py)
+        self.current_boss = self.enemies.add(
+            x=x, y=y, hp=boss_health, flags=FLAG_BOSS, level=self.boss_number
+        )
+        self.boss_spawn_time = self.time_ms
+
+        # Start shooting right away, specials after the first cooldown
+        self.schedule(0, self.boss_shoot, self.current_boss)
+        if self.boss_number >= 1:
+            self.schedule(self.boss_special_cooldown, self.boss_special, self.current_boss)
+        if barrage_for_level(self.boss_number) is not None:
+            self.schedule(0, self.boss_barrage, self.current_boss, 0, 0)
+
+    def spawn_enemy(self):
+        # Spawn enemy at random edge of screen
+        edge = self.rng.choice(['top', 'bottom', 'left', 'right'])
+
+        if edge == 'top':
+            x = self.rng.randint(50, self.screen_width - 50)
+            y = 50
+        elif edge == 'bottom':
+            x = self.rng.randint(50, self.screen_width - 50)
+            y = self.screen_height - 50
+        elif edge == 'left':
+            x = 50
+            y = self.rng.randint(50, self.screen_height - 50)
+        else:  # right
+            x = self.screen_width - 50
+            y = self.rng.randint(50, self.screen_height - 50)
+
+        # Store enemy info
+        self.add_enemy(x=x, y=y, hp=self.enemy_max_health)
+
+    def buy_upgrade(self, upgrade):
+        # Apply a shop choice (one of UPGRADES) and resume the game
+        if self.recorder is not None and upgrade in UPGRADES:
+            self.recorder.record_event("shop", upgrade)
+        if upgrade == "gun":
+            self.bullet_speed_multiplier += 0.5
+        elif upgrade == "bazooka":
+            self.bazooka_level += 1
+        elif upgrade == "shoes":
+            self.player_speed_multiplier += 0.5
+        elif upgrade == "color":
+            if self.bullet_color_level < 4:  # Max level is 4
+                self.bullet_color_level += 1
+                self.bullet_damage += 0.5
+        elif upgrade == "heart":
+            self.player_max_hp += 1
+            self.player_current_hp += 1
+        elif upgrade == "homing":
+            self.homing_level += 1
+        else:
+            raise ValueError(f"unknown upgrade: {upgrade!r}")
+        self.close_shop()
+
+    def close_shop(self):
+        # Buff enemies after each shop visit
+        self.shop_count += 1
+        self.enemy_max_health += 1
+
+        # Update health of existing enemies
+        hp = self.enemies.hp
+        for i in range(len(hp)):
+            hp[i] += 1  # Add 1 to current health
+
+        # Resume game
+        self.shop_open = False
+
+    def steer_homing(self, scale):
+        # Turn every homing shot towards the nearest enemy in HOMING_RANGE,
+        # found with enemy_grid.nearest(). step() rebuilds the grid from this
+        # tick's enemy positions before calling this, and the collision pass
+        # reuses it, so homing adds no rebuild of its own.
+        projectiles = self.projectiles
+        enemies = self.enemies
+        flags = projectiles.flags
+        homing = [i for i in range(len(flags)) if flags[i] & FLAG_HOMING]
+        if not homing or not len(enemies):
+            return
+        ex_col, ey_col = enemies.x, enemies.y
+        nearest = self.enemy_grid.nearest
+
+        max_turn = HOMING_TURN_RATE * self.homing_level * scale
+        xs, ys, dxs, dys = projectiles.x, projectiles.y, projectiles.dx, projectiles.dy
+        for i in homing:
+            x = xs[i]
+            y = ys[i]
+            j = nearest(x, y, ex_col, ey_col, HOMING_RANGE)
+            if j < 0:
+                continue
+            to_x = ex_col[j] - x
+            to_y = ey_col[j] - y
+            vx = dxs[i]
+            vy = dys[i]
+            # Signed angle from the velocity to the target, clamped to the turn rate
+            turn = math.atan2(vx * to_y - vy * to_x, vx * to_x + vy * to_y)
+            turn = max(-max_turn, min(max_turn, turn))
+            cos_turn = math.cos(turn)
+            sin_turn = math.sin(turn)
+            dxs[i] = vx * cos_turn - vy * sin_turn
+            dys[i] = vx * sin_turn + vy * cos_turn
+
+    def step(self, dt, inputs):
+        # Advance the game by dt milliseconds. inputs is the set of pressed
+        # keys ('w', 'a', 's', 'd', 'up', 'down', 'left', 'right').
+        # Don't update if game is over or shop is open
+        if self.game_over or self.shop_open:
+            return
+        if self.recorder is not None:
+            self.recorder.record_tick(dt, inputs)
+
+        # Movement below is in pixels per TICK_MS
+        scale = dt / TICK_MS
+        self.time_ms += dt
+        current_time = self.time_ms
+        mark = self.profiler.mark
+        self.profiler.start()
+
+        # Handle continuous movement based on pressed keys
+        arena = self.arena
+        old_x = self.player_x
+        old_y = self.player_y
+        current_speed = self.player_speed * self.player_speed_multiplier * scale
+        if 'w' in inputs:
+            self.player_y -= current_speed
+        if 's' in inputs:
+            self.player_y += current_speed
+        if 'a' in inputs:
+            self.player_x -= current_speed
+        if 'd' in inputs:
+            self.player_x += current_speed
+        if arena.obstacles and arena.box_blocked(self.player_x, self.player_y, PLAYER_HALF_SIZE):
+            # Walked into a wall: slide along it if one axis of the move is clear
+            if not arena.box_blocked(self.player_x, old_y, PLAYER_HALF_SIZE):
+                self.player_y = old_y
+            elif not arena.box_blocked(old_x, self.player_y, PLAYER_HALF_SIZE):
+                self.player_x = old_x
+            else:
+                self.player_x = old_x
+                self.player_y = old_y
+        mark("input")
+
+        # Check if new wave should start (every 10 kills)
+        if self.enemies_killed_this_wave >= 10:
+            self.wave_number += 1
+            self.enemies_killed_this_wave = 0
+            # Increase enemy speed each wave, but cap it at 80% of player speed
+            max_enemy_speed = (self.player_speed * self.player_speed_multiplier) * 0.8
+            current_base_enemy_speed = self.enemy_speed * self.enemy_speed_multiplier
+            if current_base_enemy_speed < max_enemy_speed:
+                self.enemy_speed_multiplier += 0.1
+
+        # Spawn boss every 30 kills (at 30, 60, 90, etc.)
+        if self.enemies_killed > 0 and self.enemies_killed % 30 == 0 and self.current_boss is None and self.enemies_killed != self.last_boss_spawn_kills:
+            self.last_boss_spawn_kills = self.enemies_killed
+            self.spawn_boss()
+
+        # Run timer events that are due (boss attacks, and enemy spawns,
+        # which spawn_tick profiles as "spawn" itself)
+        self.scheduler.run_due(current_time)
+        mark("boss")
+
+        # Handle automatic shooting with cooldown
+        if current_time - self.last_shoot_time >= self.shoot_cooldown:
+            # Determine shooting direction based on arrow keys pressed
+            dx, dy = 0, 0
+
+            if 'up' in inputs:
+                dy = -1
+            if 'down' in inputs:
+                dy = 1
+            if 'left' in inputs:
+                dx = -1
+            if 'right' in inputs:
+                dx = 1
+
+            # Shoot if any arrow key is pressed
+            if dx != 0 or dy != 0:
+                self.shoot_projectile(dx, dy)
+                self.last_shoot_time = current_time
+        mark("spawn")
+
+        enemies = self.enemies
+        projectiles = self.projectiles
+        kernel = self.kernel
+
+        # Update enemies (move towards player, with wave multiplier), keeping
+        # apart from each other unless steering is turned off. Around walls
+        # they follow the flow field, which is only rebuilt when the player
+        # moves into another cell.
+        field = None
+        if arena.obstacles:
+            field = arena.field
+            field.update(self.player_x, self.player_y)
+        speed = self.enemy_speed * self.enemy_speed_multiplier * scale
+        if self.steering.enabled:
+            kernel.flock_enemies(enemies, self.player_x, self.player_y, speed, self.steering, field)
+        else:
+            kernel.move_enemies(enemies, self.player_x, self.player_y, speed, field)
+        mark("enemy_move")
+
+        # Check enemy collisions with player
+        enemies_to_remove = set()
+        for i in kernel.contact_indices(enemies, self.player_x, self.player_y, 45, 65):
+            if enemies.flags[i] & FLAG_BOSS:
+                # Boss always instakills
+                self.game_over = True
+                return
+            # Regular enemy - reduce HP
+            self.player_current_hp -= 1
+            if self.player_current_hp <= 0:
+                self.game_over = True
+                return
+            # Destroy the enemy that hit the player
+            enemies_to_remove.add(i)
+            self.effect("death", enemies.x[i], enemies.y[i])
+
+        # Rebuild the enemy broadphase grid from this tick's positions (no
+        # enemy moves again this tick), for homing and the collision pass
+        ex_col, ey_col, flags = enemies.x, enemies.y, enemies.flags
+        self.enemy_grid.rebuild(zip(range(len(enemies)), ex_col, ey_col))
+        mark("collision")
+
+        # Move all projectiles, homing ones turning first
+        if self.homing_level:
+            self.steer_homing(scale)
+        kernel.advance_projectiles(projectiles, scale)
+
+        # Projectiles that ran into a wall this tick (index -> how far along
+        # their move), all removed below
+        wall_hits = kernel.wall_hits(projectiles, arena, scale)
+        projectiles_to_remove = set(wall_hits)
+        mark("projectiles")
+
+        if self.effects is not None:
+            for i, t in wall_hits.items():
+                if projectiles.flags[i] & FLAG_HOSTILE:
+                    self.effect(
+                        "wall", projectiles.x[i] - projectiles.dx[i] * scale * (1 - t),
+                        projectiles.y[i] - projectiles.dy[i] * scale * (1 - t)
+                    )
+
+        # Check for enemy projectiles hitting player
+        for i in kernel.hostile_hits(projectiles, self.player_x, self.player_y, 33):  # Bullet radius (8) + player radius (25)
+            if i in wall_hits:
+                continue
+            # Reduce player HP
+            self.player_current_hp -= 1
+            if self.player_current_hp <= 0:
+                self.game_over = True
+                return
+            # Destroy the projectile
+            projectiles_to_remove.add(i)
+
+        # Check player projectiles against enemies. The test is swept along
+        # the path each shot covered this tick, so fast shots can't pass
+        # through an enemy between two ticks.
+        px_col, py_col, proj_flags = projectiles.x, projectiles.y, projectiles.flags
+        pdx_col, pdy_col = projectiles.dx, projectiles.dy
+        enemy_grid = self.enemy_grid
+        for i in range(len(projectiles)):
+            if proj_flags[i] & FLAG_HOSTILE:
+                continue
+            x = px_col[i]
+            y = py_col[i]
+            start_x = x - pdx_col[i] * scale
+            start_y = y - pdy_col[i] * scale
+
+            # Only enemies in grid cells along the path can be in range. The
+            # enemy reached first wins, the first in store order on a tie,
+            # and only if it is reached before any wall.
+            hit_index = -1
+            hit_time = wall_hits.get(i, 2.0)
+            for j in enemy_grid.query_segment(start_x, start_y, x, y):
+                hit_radius = 48 if flags[j] & FLAG_BOSS else 28
+                t = swept_circle_hit(start_x, start_y, x, y, ex_col[j], ey_col[j], hit_radius)
+                if t is not None and (t < hit_time or (t == hit_time and j < hit_index)):
+                    hit_index = j
+                    hit_time = t
+
+            if hit_index != -1:
+                j = hit_index
+                # Reduce enemy health by bullet damage
+                enemies.hp[j] -= self.bullet_damage
+
+                # Mark enemy for removal if health reaches 0
+                if enemies.hp[j] <= 0:
+                    if j not in enemies_to_remove:
+                        self.effect("boss_death" if flags[j] & FLAG_BOSS else "death", ex_col[j], ey_col[j])
+                    enemies_to_remove.add(j)
+                else:
+                    self.effect(
+                        "hit", start_x + (x - start_x) * hit_time, start_y + (y - start_y) * hit_time,
+                        -pdx_col[i], -pdy_col[i]
+                    )
+                projectiles_to_remove.add(i)
+            elif i in wall_hits:
+                t = wall_hits[i]
+                self.effect("wall", start_x + (x - start_x) * t, start_y + (y - start_y) * t)
+
+        mark("collision")
+
+        # Remove projectiles that left the screen
+        projectiles_to_remove.update(kernel.offscreen_indices(projectiles, self.screen_width, self.screen_height))
+
+        # Remove destroyed projectiles
+        projectiles.remove_indices(projectiles_to_remove)
+
+        # Remove destroyed enemies and update kill count
+        boss_defeated = False
+        for i in enemies_to_remove:
+            self.enemies_killed += 1
+            self.enemies_killed_this_wave += 1
+
+            # Check if boss was defeated
+            if flags[i] & FLAG_BOSS:
+                boss_defeated = True
+                self.current_boss = None
+                self.boss_number += 1  # Increment boss number for next boss
+        enemies.remove_indices(enemies_to_remove)
+        mark("removal")
+
+        # Open the shop after a boss defeat
+        if boss_defeated:
+            self.last_shop_kills = self.enemies_killed
+            self.shop_open = True
+            # Resume enemy spawns if the timer stopped during the fight
+            if self.spawn_timer is None:
+                self.spawn_timer = self.scheduler.schedule_at(
+                    self.last_enemy_spawn + self.enemy_spawn_cooldown, self.spawn_tick
+                )
+
+
+def demo_policy(sim, tick):
+    # Scripted input for headless runs: shoot at the nearest enemy and back
+    # away from it once it gets close, drifting back to the centre otherwise.
+    enemies = sim.enemies
+    keys = set()
+    nearest = -1
+    nearest_distance = 0.0
+    for i in range(len(enemies)):
+        distance = (enemies.x[i] - sim.player_x)**2 + (enemies.y[i] - sim.player_y)**2
+        if nearest == -1 or distance < nearest_distance:
+            nearest = i
+            nearest_distance = distance
+
+    if nearest != -1:
+        dx = enemies.x[nearest] - sim.player_x
+        dy = enemies.y[nearest] - sim.player_y
+        # Aim along the closest of the eight arrow-key directions
+        if abs(dx) > abs(dy) * 0.4:
+            keys.add('right' if dx > 0 else 'left')
+        if abs(dy) > abs(dx) * 0.4:
+            keys.add('down' if dy > 0 else 'up')
+        if nearest_distance < 250**2:
+            # Back away, but never off the edge of the arena
+            if dx > 0 and sim.player_x > 100:
+                keys.add('a')
+            elif dx <= 0 and sim.player_x < sim.screen_width - 100:
+                keys.add('d')
+            if dy > 0 and sim.player_y > 100:
+                keys.add('w')
+            elif dy <= 0 and sim.player_y < sim.screen_height - 100:
+                keys.add('s')
+            if keys & {'w', 'a', 's', 'd'}:
+                return keys
+
+    # Drift back towards the centre
+    if sim.player_x < sim.screen_width // 2 - 50:
+        keys.add('d')
+    elif sim.player_x > sim.screen_width // 2 + 50:
+        keys.add('a')
+    if sim.player_y < sim.screen_height // 2 - 50:
+        keys.add('s')
+    elif sim.player_y > sim.screen_height // 2 + 50:
+        keys.add('w')
+    return keys
+
+
+def run_headless(ticks, policy=demo_policy, sim=None):
+    # Run the simulation with no display. Shops are answered by cycling
+    # through UPGRADES and the game restarts on death.
+    if sim is None:
+        sim = Simulation()
+    shops = 0
+    deaths = 0
+    for tick in range(ticks):
+        if sim.shop_open:
+            sim.buy_upgrade(UPGRADES[shops % len(UPGRADES)])
+            shops += 1
+        elif sim.game_over:
+            # Seed the next run from this one, so a seeded session repeats
+            sim.reset(sim.rng.randrange(2**32))
+            deaths += 1
+        sim.step(TICK_MS, policy(sim, tick))
+    return sim, shops, deaths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the game simulation without a display.")
+    parser.add_argument("--ticks", type=int, default=10000, help="number of simulation ticks to run")
+    parser.add_argument("--seed", type=int, help="seed for the first run (random by default)")
+    parser.add_argument("--record", help="save a replay of the session to this file (see replay.py)")
+    args = parser.parse_args()
+
+    sim = Simulation(seed=args.seed)
+    if args.record:
+        from replay import InputRecorder  # replay imports this module
+        InputRecorder().attach(sim)
+
+    start = time.perf_counter()
+    sim, shops, deaths = run_headless(args.ticks, sim=sim)
+    elapsed = time.perf_counter() - start
+    print(f"{args.ticks} ticks in {elapsed:.2f}s ({args.ticks / elapsed:.0f} ticks/s)")
+    print(f"kills={sim.enemies_killed} wave={sim.wave_number} bosses={sim.boss_number} shops={shops} deaths={deaths}")
+    if args.record:
+        sim.recorder.save(args.record)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import heapq
+import struct
+import sys
+
+from entities import EntityStore
+
+# Layout: header, scalar block, rng state, enemy store, projectile store,
+# scheduler. Bump SNAPSHOT_VERSION whenever any of it changes.
+SNAPSHOT_MAGIC = b"SNAP"
+SNAPSHOT_VERSION = 4
+HEADER = struct.Struct("<4sHc")
+
+# Simulation attributes saved as-is (name, struct code). None is stored as 0
+# for the handle attributes, which are never 0 themselves.
+SCALARS = (
+    ("time_ms", "d"),
+    ("seed", "Q"),
+    ("player_speed", "d"),
+    ("enemy_speed", "d"),
+    ("enemy_spawn_cooldown", "d"),
+    ("shoot_cooldown", "d"),
+    ("boss_shoot_cooldown", "d"),
+    ("boss_special_cooldown", "d"),
+    ("player_x", "d"),
+    ("player_y", "d"),
+    ("last_shoot_time", "d"),
+    ("last_enemy_spawn", "d"),
+    ("spawn_timer", "q"),
+    ("game_over", "?"),
+    ("shop_open", "?"),
+    ("load_level", "q"),
+    ("enemies_killed", "q"),
+    ("wave_number", "q"),
+    ("enemies_killed_this_wave", "q"),
+    ("bullet_speed_multiplier", "d"),
+    ("bazooka_level", "q"),
+    ("player_speed_multiplier", "d"),
+    ("bullet_damage", "d"),
+    ("bullet_color_level", "q"),
+    ("homing_level", "q"),
+    ("player_max_hp", "q"),
+    ("player_current_hp", "q"),
+    ("enemy_max_health", "d"),
+    ("enemy_speed_multiplier", "d"),
+    ("shop_count", "q"),
+    ("last_shop_kills", "q"),
+    ("last_boss_spawn_kills", "q"),
+    ("boss_number", "q"),
+    ("current_boss", "q"),
+    ("boss_spawn_time", "d"),
+)
+SCALAR_BLOCK = struct.Struct("<" + "".join(code for _, code in SCALARS))
+OPTIONAL_HANDLES = ("spawn_timer", "current_boss")
+
+# random.Random state: 624 Mersenne Twister words plus the position, then the
+# cached gauss() value (flag, value)
+RNG_BLOCK = struct.Struct("<625I?d")
+
+STORE_HEADER = struct.Struct("<qI")  # next handle, entity count
+SCHEDULER_HEADER = struct.Struct("<dqI")  # now, next timer handle, event count
+EVENT_HEADER = struct.Struct("<dqBB")  # due, timer handle, callback, arg count
+EVENT_INT_ARG = struct.Struct("<cq")  # b"q", value
+EVENT_FLOAT_ARG = struct.Struct("<cd")  # b"d", value
+
+# Simulation methods that scheduler events may call, by index
+CALLBACKS = (
+    "spawn_tick", "boss_shoot", "boss_special", "boss_rush_attack", "boss_summon_attack", "boss_barrage",
+)
+
+# Entity columns that belong to the renderer and are not saved
+SKIPPED_COLUMNS = EntityStore.RENDER_COLUMNS
+
+BYTE_ORDER = b"l" if sys.byteorder == "little" else b"b"
+
+
+def save_state(sim):
+    # Pack the whole simulation state into bytes (see load_state)
+    parts = [HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, BYTE_ORDER)]
+
+    values = []
+    for name, _ in SCALARS:
+        value = getattr(sim, name)
+        values.append(0 if value is None else value)
+    parts.append(SCALAR_BLOCK.pack(*values))
+
+    _, words, gauss_next = sim.rng.getstate()
+    parts.append(RNG_BLOCK.pack(*words, gauss_next is not None, gauss_next or 0.0))
+
+    for store in (sim.enemies, sim.projectiles):
+        parts.append(STORE_HEADER.pack(store.next_handle, len(store)))
+        parts.append(store.handles.tobytes())
+        for name in store.column_names:
+            if name not in SKIPPED_COLUMNS:
+                parts.append(getattr(store, name).tobytes())
+
+    # Events keep their timer handles, which break ties between events due
+    # at the same time, so they run in the same order after a restore
+    scheduler = sim.scheduler
+    events = [entry for entry in scheduler.heap if entry[2] is not None]
+    parts.append(SCHEDULER_HEADER.pack(scheduler.now, scheduler.next_handle, len(events)))
+    for due, handle, callback, args in events:
+        parts.append(EVENT_HEADER.pack(due, handle, CALLBACKS.index(callback.__name__), len(args)))
+        for arg in args:
+            if isinstance(arg, int):
+                parts.append(EVENT_INT_ARG.pack(b"q", arg))
+            else:
+                parts.append(EVENT_FLOAT_ARG.pack(b"d", arg))
+    return b"".join(parts)
+
+
+def load_state(sim, data):
+    # Replace the simulation state with a save_state() blob. Entities lose
+    # their renderer items (released as if removed) and get new ones on the
+    # next draw.
+    magic, version, byte_order = HEADER.unpack_from(data, 0)
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError("not a game snapshot")
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"snapshot version {version}, expected {SNAPSHOT_VERSION}")
+    swap = byte_order != BYTE_ORDER
+    offset = HEADER.size
+
+    values = SCALAR_BLOCK.unpack_from(data, offset)
+    offset += SCALAR_BLOCK.size
+    for (name, _), value in zip(SCALARS, values):
+        if name in OPTIONAL_HANDLES and value == 0:
+            value = None
+        setattr(sim, name, value)
+
+    rng_values = RNG_BLOCK.unpack_from(data, offset)
+    offset += RNG_BLOCK.size
+    words, has_gauss, gauss_next = rng_values[:625], rng_values[625], rng_values[626]
+    sim.rng.setstate((3, words, gauss_next if has_gauss else None))
+
+    for store in (sim.enemies, sim.projectiles):
+        next_handle, count = STORE_HEADER.unpack_from(data, offset)
+        offset += STORE_HEADER.size
+        store.clear()
+        store.next_handle = next_handle
+        offset = _read_column(store.handles, data, offset, count, swap)
+        for name in store.column_names:
+            column = getattr(store, name)
+            if name in SKIPPED_COLUMNS:
+                column.frombytes(bytes(count * column.itemsize))
+            else:
+                offset = _read_column(column, data, offset, count, swap)
+        store.index_of = {handle: index for index, handle in enumerate(store.handles)}
+        store.recount()
+
+    scheduler = sim.scheduler
+    now, next_handle, count = SCHEDULER_HEADER.unpack_from(data, offset)
+    offset += SCHEDULER_HEADER.size
+    scheduler.clear(now)
+    scheduler.next_handle = next_handle
+    for _ in range(count):
+        due, handle, callback, arg_count = EVENT_HEADER.unpack_from(data, offset)
+        offset += EVENT_HEADER.size
+        args = []
+        for _ in range(arg_count):
+            arg_struct = EVENT_INT_ARG if data[offset:offset + 1] == b"q" else EVENT_FLOAT_ARG
+            args.append(arg_struct.unpack_from(data, offset)[1])
+            offset += arg_struct.size
+        entry = [due, handle, getattr(sim, CALLBACKS[callback]), tuple(args)]
+        scheduler.heap.append(entry)
+        scheduler.pending[handle] = entry
+    heapq.heapify(scheduler.heap)
+    return offset
+
+
+def _read_column(column, data, offset, count, swap):
+    end = offset + count * column.itemsize
+    column.frombytes(data[offset:end])
+    if swap:
+        column.byteswap()
+    return end
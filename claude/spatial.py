@@ -0,0 +1,137 @@
+import math
+
+
+class SpatialGrid:
+    # Uniform grid broadphase. Points are bucketed by cell, so a query only
+    # looks at the 3x3 block of cells around a position. The cell size must be
+    # at least the largest radius queried, otherwise hits can be missed.
+    # nearest() has no such limit: it widens its search until done.
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.ring_offsets = [[(0, 0)]]  # cell offsets r cells away, for nearest()
+
+    def clear(self):
+        self.cells.clear()
+
+    def insert(self, index, x, y):
+        key = (int(x // self.cell_size), int(y // self.cell_size))
+        bucket = self.cells.get(key)
+        if bucket is None:
+            self.cells[key] = [index]
+        else:
+            bucket.append(index)
+
+    def rebuild(self, points):
+        # points: iterable of (index, x, y)
+        self.cells.clear()
+        for index, x, y in points:
+            self.insert(index, x, y)
+
+    def query(self, x, y):
+        # Return every index stored in the cells neighbouring (x, y)
+        cx = int(x // self.cell_size)
+        cy = int(y // self.cell_size)
+        cells = self.cells
+        found = []
+        for gx in (cx - 1, cx, cx + 1):
+            for gy in (cy - 1, cy, cy + 1):
+                bucket = cells.get((gx, gy))
+                if bucket:
+                    found.extend(bucket)
+        return found
+
+    def query_segment(self, x0, y0, x1, y1):
+        # Return every index stored in the cells around the segment's bounding
+        # box, i.e. everything within one cell of the segment. Short segments
+        # (one tick of movement) only touch a few cells.
+        size = self.cell_size
+        cx0 = int(min(x0, x1) // size) - 1
+        cx1 = int(max(x0, x1) // size) + 1
+        cy0 = int(min(y0, y1) // size) - 1
+        cy1 = int(max(y0, y1) // size) + 1
+        cells = self.cells
+        found = []
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(cells):
+            # Longer than the occupied area is wide: walk the buckets instead
+            for (gx, gy), bucket in cells.items():
+                if cx0 <= gx <= cx1 and cy0 <= gy <= cy1:
+                    found.extend(bucket)
+            return found
+        for gx in range(cx0, cx1 + 1):
+            for gy in range(cy0, cy1 + 1):
+                bucket = cells.get((gx, gy))
+                if bucket:
+                    found.extend(bucket)
+        return found
+
+    def nearest(self, x, y, xs, ys, max_distance=math.inf):
+        # Index of the point closest to (x, y) and no further than
+        # max_distance (the lowest index on a tie), or -1. xs and ys are the
+        # points' coordinates by index. Walks rings of cells outward from
+        # (x, y) and stops at the first ring that can't hold anything as
+        # close as the best so far.
+        size = self.cell_size
+        cells = self.cells
+        get = cells.get
+        offsets = self.ring_offsets
+        cx = int(x // size)
+        cy = int(y // size)
+        best = -1
+        limit = max_distance * max_distance
+        ring = 0
+        while True:
+            # Every point in this ring is at least `reach` away on one axis:
+            # the gap from (x, y) to the nearest side of the ring
+            reach = min(
+                (cx + ring) * size - x, x - (cx - ring + 1) * size,
+                (cy + ring) * size - y, y - (cy - ring + 1) * size,
+            )
+            if reach > 0 and reach * reach > limit:
+                return best
+            last = (2 * ring + 1) ** 2 > 4 * len(cells)
+            if last:
+                # Far more cells to look up than are occupied: check every
+                # point instead (those already seen can't win twice)
+                buckets = cells.values()
+            else:
+                if ring == len(offsets):
+                    offsets.append([
+                        (dx, dy) for dx in range(-ring, ring + 1) for dy in range(-ring, ring + 1)
+                        if max(abs(dx), abs(dy)) == ring
+                    ])
+                buckets = [get((cx + dx, cy + dy)) for dx, dy in offsets[ring]]
+            for bucket in buckets:
+                if not bucket:
+                    continue
+                for index in bucket:
+                    distance = (xs[index] - x) ** 2 + (ys[index] - y) ** 2
+                    if distance < limit or (distance == limit and (best == -1 or index < best)):
+                        best = index
+                        limit = distance
+            if last:
+                return best
+            ring += 1
+
+
+def swept_circle_hit(x0, y0, x1, y1, cx, cy, radius):
+    # Fraction (0..1) of the way from (x0, y0) to (x1, y1) at which a point
+    # moving along the segment first comes closer than radius to (cx, cy),
+    # or None if it never does
+    fx = x0 - cx
+    fy = y0 - cy
+    c = fx * fx + fy * fy - radius * radius
+    if c < 0:
+        return 0.0
+    dx = x1 - x0
+    dy = y1 - y0
+    a = dx * dx + dy * dy
+    b = fx * dx + fy * dy
+    if a == 0 or b >= 0:
+        # Not moving, or moving away from the centre
+        return None
+    discriminant = b * b - a * c
+    if discriminant < 0:
+        return None
+    t = (-b - math.sqrt(discriminant)) / a
+    return t if t <= 1 else None
@@ -0,0 +1,21 @@
+class Steering:
+    # Weights for how regular enemies pick their direction each tick.
+    #
+    # chase pulls straight at the player, separation pushes away from
+    # enemies closer than `radius` (harder the closer they are) and cohesion
+    # pulls towards the middle of those neighbours. The weighted sum is
+    # clamped to unit length and scaled by the enemy speed, so crowding slows
+    # an enemy down rather than speeding it up. Bosses always chase straight.
+    #
+    # Neighbours come from a grid with `radius`-sized cells (see
+    # kernels.flock_enemies), so a tick costs O(enemies x neighbours).
+    # With separation and cohesion both 0 enemies move exactly as before.
+    def __init__(self, chase=1.0, separation=3.0, cohesion=0.1, radius=40.0):
+        self.chase = chase
+        self.separation = separation
+        self.cohesion = cohesion
+        self.radius = radius
+
+    @property
+    def enabled(self):
+        return bool(self.separation or self.cohesion)
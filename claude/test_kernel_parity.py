@@ -0,0 +1,100 @@
+# Seeded games must play out bit for bit the same on the Python and NumPy
+# kernels.
+#
+# Each game is played twice side by side, one Simulation per kernel: a
+# god-mode demo player starts in a crowd of enemies and shots, and a boss of
+# the next level (so every boss attack and barrage) spawns at a fixed
+# interval. replay.state_digest() of the two must agree after every tick;
+# the first tick that differs fails with an AssertionError. Skipped when
+# NumPy is not installed.
+#
+#   python -m pytest test_kernel_parity.py
+#   python test_kernel_parity.py [--ticks 3000] [--seeds 3]
+import argparse
+import random
+
+from entities import FLAG_HOSTILE
+from kernels import np
+from replay import state_digest
+from simulation import Simulation, TICK_MS, UPGRADES, demo_policy
+
+# Large enough that only a boss contact can end a run
+GOD_MODE_HP = 10**9
+
+# Ticks per game and ticks between bosses under pytest (bosses 0-3)
+TEST_TICKS = 1200
+TEST_BOSS_EVERY = 300
+
+
+def first_divergence(seed, ticks, crowd=300, boss_every=500):
+    # Play one seeded game under each kernel; returns the first tick whose
+    # state differs, or None. Shops are answered in turn and a boss contact
+    # restarts from the game's own rng.
+    sims = [Simulation(seed=seed, kernel=name) for name in ("python", "numpy")]
+    sims[1].kernel.min_batch = 1  # every pass on NumPy, however small
+    width, height = sims[0].screen_width, sims[0].screen_height
+    rng = random.Random(seed)
+    enemies = [(rng.uniform(50, width - 50), rng.uniform(50, height - 50)) for _ in range(crowd)]
+    shots = [
+        (rng.uniform(0, width), rng.uniform(0, height), rng.uniform(-8, 8), rng.uniform(-8, 8),
+         FLAG_HOSTILE if rng.random() < 0.3 else 0)
+        for _ in range(crowd)
+    ]
+    for sim in sims:
+        sim.player_max_hp = sim.player_current_hp = GOD_MODE_HP
+        for x, y in enemies:
+            sim.enemies.add(x=x, y=y, hp=sim.enemy_max_health)
+        for x, y, dx, dy, flags in shots:
+            sim.projectiles.add(x=x, y=y, dx=dx, dy=dy, flags=flags)
+    shops = 0
+    for tick in range(ticks):
+        for sim in sims:
+            if sim.shop_open:
+                sim.buy_upgrade(UPGRADES[shops % len(UPGRADES)])
+            elif sim.game_over:
+                sim.reset(sim.rng.randrange(2**32))
+                sim.player_max_hp = sim.player_current_hp = GOD_MODE_HP
+            elif tick % boss_every == boss_every - 1 and sim.current_boss is None:
+                sim.boss_number = tick // boss_every
+                sim.last_boss_spawn_kills = sim.enemies_killed
+                sim.spawn_boss()
+            sim.step(TICK_MS, demo_policy(sim, tick))
+        if sims[0].shop_open:
+            shops += 1
+        if state_digest(sims[0]) != state_digest(sims[1]):
+            return tick
+    return None
+
+
+def check_seed(seed, ticks, boss_every):
+    if np is None:
+        import pytest
+        pytest.skip("the numpy kernel needs NumPy")
+    tick = first_divergence(seed, ticks, boss_every=boss_every)
+    assert tick is None, f"seed {seed}: python and numpy games diverged at tick {tick}"
+
+
+def test_seed_1_matches():
+    check_seed(1, TEST_TICKS, TEST_BOSS_EVERY)
+
+
+def test_seed_2_matches():
+    check_seed(2, TEST_TICKS, TEST_BOSS_EVERY)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ticks", type=int, default=3000)
+    parser.add_argument("--seeds", type=int, default=3)
+    args = parser.parse_args()
+    if np is None:
+        print("NumPy is not installed; only the Python kernel is available")
+        return
+    for seed in range(1, args.seeds + 1):
+        tick = first_divergence(seed, args.ticks)
+        assert tick is None, f"seed {seed}: python and numpy games diverged at tick {tick}"
+        print(f"seed {seed}: {args.ticks} ticks identical on both kernels")
+
+
+if __name__ == "__main__":
+    main()
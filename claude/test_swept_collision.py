@@ -0,0 +1,149 @@
+# Property checks for swept projectile collision at extreme bullet speeds.
+#
+# 1. swept_circle_hit() agrees with densely sampling the segment: it reports
+#    a hit exactly when some point of the path gets within the radius, and
+#    the point it reports is on the circle (or inside, at t = 0).
+# 2. In a real Simulation, a shot fired straight at a frozen enemy always
+#    hits it once, whatever bullet_speed_multiplier is, and a shot passing
+#    just wide of it never does.
+# 3. SpatialGrid.query_segment() never drops an enemy that the swept test
+#    would hit, however long the segment.
+#
+# pytest collects the test_* functions (a smaller, fixed set of cases).
+# Run directly for a longer check; either way the first failing case is
+# raised as an AssertionError, so the exit status is non-zero.
+#
+#   python -m pytest test_swept_collision.py
+#   python test_swept_collision.py [--cases 2000]
+import argparse
+import math
+import random
+
+from entities import FLAG_BOSS
+from simulation import Simulation, TICK_MS
+from spatial import SpatialGrid, swept_circle_hit
+
+MULTIPLIERS = (1, 2.5, 5, 10, 25, 50, 100, 250)
+
+# Cases per check under pytest
+TEST_CASES = 500
+DIRECTIONS = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy]
+
+
+def fail(message, **case):
+    raise AssertionError(f"{message}: {case}")
+
+
+def check_against_sampling(rng, cases):
+    for _ in range(cases):
+        x0, y0 = rng.uniform(-500, 500), rng.uniform(-500, 500)
+        length = rng.choice((0.0, 1.0, 30.0, 300.0, 3000.0))
+        angle = rng.uniform(0, 2 * math.pi)
+        x1, y1 = x0 + math.cos(angle) * length, y0 + math.sin(angle) * length
+        cx, cy = rng.uniform(-600, 600), rng.uniform(-600, 600)
+        radius = rng.choice((8.0, 28.0, 48.0))
+
+        t = swept_circle_hit(x0, y0, x1, y1, cx, cy, radius)
+        samples = max(2, int(length * 4))
+        closest = min(
+            math.hypot(x0 + (x1 - x0) * k / samples - cx, y0 + (y1 - y0) * k / samples - cy)
+            for k in range(samples + 1)
+        )
+        # Sampling is only exact to half a sample step either way
+        slack = length / samples
+        if t is None and closest < radius - slack:
+            fail("missed a segment that enters the circle", segment=(x0, y0, x1, y1), circle=(cx, cy, radius))
+        if t is not None:
+            if closest > radius + slack:
+                fail("hit a segment that stays outside", segment=(x0, y0, x1, y1), circle=(cx, cy, radius))
+            distance = math.hypot(x0 + (x1 - x0) * t - cx, y0 + (y1 - y0) * t - cy)
+            if not (0 <= t <= 1) or distance > radius + 1e-6 or (t > 0 and distance < radius - 1e-6):
+                fail("reported the wrong entry point", t=t, distance=distance, radius=radius)
+
+
+def fire_at_enemy(seed, multiplier, direction, distance, offset, boss=False):
+    # One shot from the player along `direction` at an enemy `distance` px
+    # ahead and `offset` px to the side. Returns the enemy's hp loss.
+    sim = Simulation(4000, 4000, seed=seed, obstacles=False)
+    sim.scheduler.clear(sim.time_ms)
+    sim.spawn_timer = None
+    sim.enemy_speed_multiplier = 0.0
+    sim.bullet_speed_multiplier = multiplier
+    dx, dy = direction
+    norm = math.hypot(dx, dy)
+    ux, uy = dx / norm, dy / norm
+    ex = sim.player_x + ux * distance - uy * offset
+    ey = sim.player_y + uy * distance + ux * offset
+    sim.enemies.add(x=ex, y=ey, hp=1000, flags=FLAG_BOSS if boss else 0)
+    sim.shoot_projectile(dx, dy)
+    for _ in range(2000):
+        if not len(sim.projectiles):
+            break
+        sim.step(TICK_MS, set())
+    return 1000 - sim.enemies.hp[0]
+
+
+def check_simulation(rng, cases):
+    for multiplier in MULTIPLIERS:
+        for _ in range(cases):
+            direction = rng.choice(DIRECTIONS)
+            boss = rng.random() < 0.2
+            radius = 48 if boss else 28
+            distance = rng.uniform(radius + 30, 1800)
+            inside = rng.uniform(-radius + 1, radius - 1)
+            outside = rng.choice((-1, 1)) * rng.uniform(radius + 1, radius + 40)
+            seed = rng.randrange(2**32)
+            case = dict(multiplier=multiplier, direction=direction, distance=distance, boss=boss, seed=seed)
+            if fire_at_enemy(seed, multiplier, direction, distance, inside, boss) != 1:
+                fail("shot on target did not hit exactly once", offset=inside, **case)
+            if fire_at_enemy(seed, multiplier, direction, distance, outside, boss) != 0:
+                fail("shot wide of the target hit it", offset=outside, **case)
+
+
+def check_broadphase(rng, cases):
+    grid = SpatialGrid(cell_size=64)
+    for _ in range(cases // 10):
+        points = [(i, rng.uniform(0, 1920), rng.uniform(0, 1080)) for i in range(200)]
+        grid.rebuild(points)
+        for _ in range(10):
+            x0, y0 = rng.uniform(0, 1920), rng.uniform(0, 1080)
+            speed = 8 * rng.choice(MULTIPLIERS)
+            angle = rng.uniform(0, 2 * math.pi)
+            x1, y1 = x0 + math.cos(angle) * speed, y0 + math.sin(angle) * speed
+            candidates = set(grid.query_segment(x0, y0, x1, y1))
+            for i, cx, cy in points:
+                if swept_circle_hit(x0, y0, x1, y1, cx, cy, 48) is not None and i not in candidates:
+                    fail("broadphase dropped a hit", segment=(x0, y0, x1, y1), point=(cx, cy))
+
+
+def test_swept_hit_matches_sampling():
+    check_against_sampling(random.Random(1), TEST_CASES)
+
+
+def test_broadphase_keeps_every_hit():
+    check_broadphase(random.Random(2), TEST_CASES)
+
+
+def test_no_tunnelling_at_any_speed():
+    check_simulation(random.Random(3), max(1, TEST_CASES // 100))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cases", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    check_against_sampling(rng, args.cases)
+    print(f"swept_circle_hit matches sampling on {args.cases} segments")
+    check_broadphase(rng, args.cases)
+    print(f"grid query_segment kept every hit on {args.cases} segments")
+    per_multiplier = max(1, args.cases // 100)
+    check_simulation(rng, per_multiplier)
+    print(f"no tunnelling at bullet speed x{', x'.join(str(m) for m in MULTIPLIERS)} "
+          f"({per_multiplier} shots each, on target and wide)")
+
+
+if __name__ == "__main__":
+    main()